@@ -1,13 +1,24 @@
 import frappe
-from frappe.utils import cint, flt
+from frappe.utils import cint, flt, fmt_money, get_datetime
 import json
 from datetime import datetime
+from frappe_utils.catalog import (
+	PRICE_FIELDS, STOCK_FIELDS, get_customer_price_list, get_session_customer, get_stock_map,
+	parse_fields, project, resolve_prices, wants
+)
+from frappe_utils.ratings import get_rating_info
+from frappe_utils.website_customization.doctype.website_image_variant.website_image_variant import get_image_variants
+from frappe_utils.utils import (
+	get_active_work_order_items, get_cached, get_doctype_version, get_stock_status, has_active_work_order,
+	make_etag, respond_with_etag
+)
 
 
 @frappe.whitelist(allow_guest=True)
 def get_product_filters(item_group=None):
 	"""
 	Returns available filters (field and attribute filters) and sub-categories.
+	Tagged with an ETag, so clients revalidating with If-None-Match get a 304.
 	"""
 	if "webshop" not in frappe.get_installed_apps():
 		return {
@@ -15,15 +26,25 @@ def get_product_filters(item_group=None):
 			"sub_categories": []
 		}
 
+	# If item_group is None or empty string, treat is as None
+	if not item_group:
+		item_group = None
+
+	# Filters only change with the items, groups, attributes and webshop settings behind them
+	version = get_doctype_version(
+		["Website Item", "Item Group", "Item Attribute"],
+		frappe.get_cached_doc("Webshop Settings").modified,
+		item_group
+	)
+	return respond_with_etag(version, lambda: _build_product_filters(item_group))
+
+
+def _build_product_filters(item_group):
 	from webshop.webshop.product_data_engine.filters import ProductFiltersBuilder
 	from webshop.webshop.product_data_engine.query import ProductQuery
 	from webshop.webshop.doctype.override_doctype.item_group import get_child_groups_for_website
 
 	filters = {}
-	
-	# If item_group is None or empty string, treat is as None
-	if not item_group:
-		item_group = None
 
 	filter_engine = ProductFiltersBuilder()
 	filters["field_filters"] = filter_engine.get_field_filters()
@@ -48,8 +69,56 @@ def get_stock(item_code, warehouse=None):
 	return get_web_item_qty_in_stock(item_code, "website_warehouse", warehouse)
 
 
+STOCK_CACHE_TTL = 5
+STOCK_BULK_LIMIT = 500
+
+
+@frappe.whitelist(allow_guest=True)
+def get_stock_bulk(item_codes, warehouse=None):
+	"""
+	Stock of many items in one call, for carts and listing widgets.
+	Args:
+		item_codes (list/json): Item codes (at most 500, more is rejected)
+		warehouse (str): Optional warehouse, defaults to each item's website warehouse
+	Returns:
+		dict: {item_code: {"stock_qty", "in_stock", "is_stock_item", "stock_status"}}
+	"""
+	if "webshop" not in frappe.get_installed_apps():
+		return {}
+
+	if isinstance(item_codes, str):
+		item_codes = frappe.parse_json(item_codes)
+	# codes can arrive as JSON numbers, and sorting a mix of str and int fails
+	item_codes = sorted({str(code) for code in item_codes or [] if code not in (None, "")})
+	if not item_codes:
+		return {}
+	if len(item_codes) > STOCK_BULK_LIMIT:
+		frappe.throw(f"At most {STOCK_BULK_LIMIT} item codes can be requested at once")
+
+	def build():
+		stock = get_stock_map(item_codes, warehouse)
+		items_in_process = get_active_work_order_items(item_codes)
+		for item_code, stock_data in stock.items():
+			stock_data["stock_status"] = get_stock_status(
+				stock_data.is_stock_item, stock_data.stock_qty, item_code in items_in_process
+			)
+		return stock
+
+	# Short-lived, shared by every caller asking for the same set
+	return get_cached(
+		f"frappe_utils:stock_bulk:{make_etag(warehouse, *item_codes)}",
+		build,
+		expires_in_sec=STOCK_CACHE_TTL
+	)
+
+
 @frappe.whitelist(allow_guest=True)
-def get_products_with_stock(query_args=None,home_page=0):
+def get_products_with_stock(query_args=None,home_page=0,fields=None):
+	"""
+	Webshop product listing with customer prices and stock status.
+	`fields` (list, JSON list or comma separated) trims each item to those keys and
+	skips the price and stock lookups the projection doesn't need.
+	"""
 	if "webshop" not in frappe.get_installed_apps():
 		return {"message": {"items": []}}
 
@@ -75,118 +144,186 @@ def get_products_with_stock(query_args=None,home_page=0):
 		return data
 
 	item_codes = [item.item_code for item in data["items"]]
+	fields = parse_fields(fields)
+	is_home_page = int(home_page)
+	if fields is not None and is_home_page:
+		# home page sections are grouped on these keys
+		fields |= {"custom_section", "custom_section_order"}
 	
-	# Batch query for active Work Orders
-	# "active" = In Process (as per previous logic) or broad check if we want to match utils.py exactly
-	# For API performance, we stick to the Requirement: "In Process" status or similar. 
-	# Implementation Plan said: "API will always return items that have an active Work Order... even if discontinued."
-	# User cleared "active" = not Completed/Cancelled.
-	# So I should update the WO filter to match `utils.py` logic: status NOT IN ("Completed", "Cancelled")
+	# Active Work Orders: status not Completed/Cancelled, answered from the cached set
 	
 	items_in_process = set()
 	discontinued_map = {}
-	is_home_page = int(home_page)
 
 	if item_codes:
 		# Work Orders
-		work_orders = frappe.db.get_all(
-			"Work Order",
-			filters={
-				"production_item": ["in", item_codes],
-				"status": ["not in", ["Completed", "Cancelled"]], # Exclude inactive
-				"docstatus": ["in", [1, 0]] 
-			},
-			fields=["production_item", "status"],
-			distinct=True
-		)
-		items_in_process = {d.production_item for d in work_orders}
+		items_in_process = get_active_work_order_items(item_codes)
 
 		# Discontinued Status & Custom Fields
-		fields = ["item_code", "discontinued"]
+		wi_fields = ["item_code", "discontinued"]
 		if is_home_page:
-			fields.extend(["custom_section", "custom_section_order"])
+			wi_fields.extend(["custom_section", "custom_section_order"])
 
 		# Fetch from Website Item. Assuming 1-to-1 mapping or we take the first one found.
 		# Note: get_product_filter_data items usually come from Website Item, so item_code is the link.
 		wi_data = frappe.db.get_all(
 			"Website Item",
 			filters={"item_code": ["in", item_codes]},
-			fields=fields
+			fields=wi_fields
 		)
 		for d in wi_data:
 			discontinued_map[d.item_code] = d
 
+	# Re-price with the session customer's price list (webshop list as fallback)
+	prices = {}
+	if wants(fields, *PRICE_FIELDS) or price_min is not None or price_max is not None:
+		# fallback rates in the customer list currency, so the price filter compares like with like
+		prices = resolve_prices(item_codes, convert=True)
+
+	# Without stock in the projection only discontinued items need it, for the visibility check
+	with_stock = wants(fields, *STOCK_FIELDS)
+
+	with_variants = wants(fields, "website_image_variants")
+	image_variants = {}
+	if with_variants:
+		image_variants = get_image_variants([item.get("website_image") for item in data["items"]])
+
 	valid_items = []
 	for item in data["items"]:
-		stock_data = get_web_item_qty_in_stock(item.item_code, "website_warehouse")
-		if stock_data:
-			item.update(stock_data)
-
-			# Determine Stock Status
-			wi_item_data = discontinued_map.get(item.item_code, {})
-			
-			actual_qty = stock_data.get("stock_qty", 0.0)
-			is_stock_item = stock_data.get("is_stock_item", 0)
-			is_discontinued = wi_item_data.get("discontinued", 0)
-			has_active_wo = item.item_code in items_in_process
-
-			# API Guard: Visibility Check
-			# Logic: If Discontinued AND Stock <= 0 AND No Active WO -> Hide
-			if is_discontinued and actual_qty <= 0 and not has_active_wo:
+		if price := prices.get(item.item_code):
+			if price.price_list_rate != item.get("price_list_rate"):
+				item["formatted_price"] = fmt_money(price.price_list_rate, currency=price.currency)
+			item["price_list_rate"] = price.price_list_rate
+			item["currency"] = price.currency
+
+		wi_item_data = discontinued_map.get(item.item_code, {})
+		is_discontinued = wi_item_data.get("discontinued", 0)
+		has_active_wo = item.item_code in items_in_process
+
+		stock_data = {}
+		if with_stock or is_discontinued:
+			stock_data = get_web_item_qty_in_stock(item.item_code, "website_warehouse")
+			if not stock_data:
 				continue
 
-			# Price Filtering
-			# We use price_list_rate as the base price.
-			# In different contexts "website_item_price" or "formatted_mrp" might be used,
-			# but price_list_rate is the standard raw float value for sorting/filtering.
-			item_price = item.get("price_list_rate") or 0.0
-			if price_min is not None and item_price < price_min:
-				continue
-			if price_max is not None and item_price > price_max:
-				continue
+		# Determine Stock Status
+		actual_qty = stock_data.get("stock_qty", 0.0)
+		is_stock_item = stock_data.get("is_stock_item", 0)
+
+		# API Guard: Visibility Check
+		# Logic: If Discontinued AND Stock <= 0 AND No Active WO -> Hide
+		if is_discontinued and actual_qty <= 0 and not has_active_wo:
+			continue
+
+		# Price Filtering
+		# We use price_list_rate as the base price.
+		# In different contexts "website_item_price" or "formatted_mrp" might be used,
+		# but price_list_rate is the standard raw float value for sorting/filtering.
+		item_price = item.get("price_list_rate") or 0.0
+		if price_min is not None and item_price < price_min:
+			continue
+		if price_max is not None and item_price > price_max:
+			continue
+
+		if with_stock:
+			item.update(stock_data)
+			item["total_quantity"] = actual_qty
+			item["stock_status"] = get_stock_status(is_stock_item, actual_qty, has_active_wo)
 
-			stock_status = "Out of Stock"
-			
-			if not is_stock_item:
-				stock_status = "In Stock"
-			elif actual_qty > 0:
-				stock_status = "In Stock"
-			elif has_active_wo:
-				stock_status = "In Process"
-			
-			if is_home_page:
-				item["custom_section"] = wi_item_data.get("custom_section")
-				item["custom_section_order"] = wi_item_data.get("custom_section_order")
+		if is_home_page:
+			item["custom_section"] = wi_item_data.get("custom_section")
+			item["custom_section_order"] = wi_item_data.get("custom_section_order")
 
-			item["total_quantity"] = actual_qty
-			item["stock_status"] = stock_status
-			valid_items.append(item)
+		if with_variants:
+			item["website_image_variants"] = image_variants.get(item.get("website_image")) or {}
+
+		valid_items.append(project(item, fields))
 
 	data["items"] = valid_items
 	return data
 
 
+PRODUCT_INFO_FIELDS = [
+	"name", "web_item_name", "item_name", "item_code", "website_image",
+	"web_long_description", "short_description", "ranking",
+	"on_backorder", "item_group", "route", "slideshow"
+]
+RATING_FIELDS = ("avg_rating", "review_count", "rating_histogram")
+
+
 @frappe.whitelist(allow_guest=True)
-def get_product_info(item_code):
+def get_product_info(item_code, fields=None):
 	"""
 	Get detailed info for a single product.
 	'item_code' argument here is expected to be the Website Item Name (primary key).
+	`fields` (list, JSON list or comma separated) trims the response to those keys and
+	skips the stock, rating, wishlist, specification and slideshow lookups not asked for.
+	The response carries an ETag; a matching If-None-Match gets a 304 without building it.
 	"""
 	if "webshop" not in frappe.get_installed_apps():
 		return {}
 
+	fields = parse_fields(fields)
+
+	version = _get_product_info_version(item_code, fields)
+	if not version:
+		return {}
+
+	return respond_with_etag(version, lambda: _build_product_info(item_code, fields))
+
+
+def _get_product_info_version(name, fields):
+	"""
+	Version token of a product page: Website Item (specifications included), its
+	slideshow, Bin rows and image variants by `modified`, plus the cached price, rating summary and
+	Work Order state. Viewer dependent parts (price list, wishlist) are folded in too.
+	"""
+	row = frappe.db.sql("""
+		SELECT
+			wi.item_code,
+			wi.modified,
+			(SELECT ws.modified FROM `tabWebsite Slideshow` ws WHERE ws.name = wi.slideshow) AS slideshow_modified,
+			(SELECT MAX(b.modified) FROM `tabBin` b WHERE b.item_code = wi.item_code) AS bin_modified,
+			(SELECT MAX(v.modified) FROM `tabWebsite Image Variant` v) AS variants_modified
+		FROM `tabWebsite Item` wi
+		WHERE wi.name = %s
+	""", name, as_dict=True)
+	if not row:
+		return None
+
+	row = row[0]
+	# Item Price and Item Review keep these caches current, deletions included
+	price = resolve_prices([row.item_code]).get(row.item_code) or {}
+	rating = get_rating_info(name)
+	parts = [
+		row.modified, row.slideshow_modified, row.bin_modified, row.variants_modified,
+		price.get("price_list_rate"), price.get("currency"),
+		rating["review_count"], rating["avg_rating"],
+		has_active_work_order(row.item_code),
+		sorted(fields or [])
+	]
+
+	if wants(fields, "wished") and frappe.session.user != "Guest":
+		from frappe_utils.website_customization.api.wishlist import get_wishlist_state
+		parts += [frappe.session.user, get_wishlist_state()["version"]]
+
+	return make_etag(*parts)
+
+
+def _build_product_info(item_code, fields):
 	from webshop.webshop.utils.product import get_web_item_qty_in_stock
 
 	# Fetch Website Item
 	# We lookup by NAME (Primary Key) as per requirement.
 	# The argument 'item_code' is treated as the Website Item Name.
-	ws_item = frappe.db.get_value("Website Item",
-		item_code,
-		["name", "web_item_name", "item_name", "item_code", "website_image",
-		 "web_long_description", "short_description", "ranking",
-		 "on_backorder", "item_group", "route","slideshow"],
-		as_dict=True
-	)
+	columns = PRODUCT_INFO_FIELDS
+	if fields is not None:
+		columns = ["name", "item_code", "slideshow", "website_image"] + [
+			field for field in PRODUCT_INFO_FIELDS
+			if field in fields and field not in ("name", "item_code", "slideshow", "website_image")
+		]
+
+	ws_item = frappe.db.get_value("Website Item", item_code, columns, as_dict=True)
 
 	if not ws_item:
 		return {}
@@ -198,109 +335,138 @@ def get_product_info(item_code):
 	real_item_code = ws_item.item_code
 
 	# Fetch Price
-	# Try to get price from Item Price
-	# Ideally we use the default price list from Webshop Settings
-	price_list = frappe.db.get_single_value("Webshop Settings", "price_list") or "Standard Selling"
-	price_args = {"item_code": real_item_code, "price_list": price_list}
-	
-	price_doc = frappe.db.get_value("Item Price", price_args, ["price_list_rate", "currency"], as_dict=True)
-	
-	if price_doc:
-		item["price_list_rate"] = price_doc.price_list_rate
-		item["currency"] = price_doc.currency
-	else:
-		item["price_list_rate"] = 0.0
-		item["currency"] = frappe.db.get_value("Price List", price_list, "currency") or "INR"
-
-	# Fetch Stock
-	stock_data = get_web_item_qty_in_stock(real_item_code, "website_warehouse")
-	if stock_data:
-		item.update(stock_data)
-
-	# Stock Status Logic
-	actual_qty = item.get("stock_qty", 0.0)
-	is_stock_item = item.get("is_stock_item", 0)
-
-	# Check for active Work Order using real_item_code
-	has_active_wo = False
-	if frappe.db.exists("Work Order", {
-		"production_item": real_item_code,
-		"status": ["not in", ["Completed", "Cancelled"]],
-		"docstatus": ["in", [1, 0]]
-	}):
-		has_active_wo = True
-
-	stock_status = "Out of Stock"
-	if not is_stock_item:
-		stock_status = "In Stock"
-	elif actual_qty > 0:
-		stock_status = "In Stock"
-	elif has_active_wo:
-		stock_status = "In Process"
-
-	item["total_quantity"] = actual_qty
-	item["stock_status"] = stock_status
+	# Customer's own price list first, then the Webshop Settings price list
+	if wants(fields, "price_list_rate", "currency"):
+		price_doc = resolve_prices([real_item_code]).get(real_item_code)
+
+		if price_doc:
+			item["price_list_rate"] = price_doc.price_list_rate
+			item["currency"] = price_doc.currency
+		else:
+			price_list = get_customer_price_list(get_session_customer())
+			item["price_list_rate"] = 0.0
+			item["currency"] = frappe.get_cached_value("Price List", price_list, "currency") or "INR"
+
+	if wants(fields, *STOCK_FIELDS):
+		# Fetch Stock
+		stock_data = get_web_item_qty_in_stock(real_item_code, "website_warehouse")
+		if stock_data:
+			item.update(stock_data)
 
-	# Fetch Ratings
-	# Review Logic: Rating is 0-1 in DB, convert to 0-5
-	rating_data = frappe.db.get_all("Item Review",
-		filters={"website_item": item_code}, # item_code is the name here as per new logic
-		fields=["avg(rating) as avg_rating", "count(name) as total"],
-		as_list=False, ignore_permissions=True
-	)
+		# Stock Status Logic
+		actual_qty = item.get("stock_qty", 0.0)
+		is_stock_item = item.get("is_stock_item", 0)
 
-	if rating_data:
-		db_rating = rating_data[0].get("avg_rating") or 0.0
-		item["avg_rating"] = db_rating * 5 # Convert 0-1 to 0-5
-		item["review_count"] = rating_data[0].get("total") or 0
-	else:
-		item["avg_rating"] = 0.0
-		item["review_count"] = 0
+		# Check for active Work Order using real_item_code
+		has_active_wo = has_active_work_order(real_item_code)
+
+		stock_status = get_stock_status(is_stock_item, actual_qty, has_active_wo)
+
+		item["total_quantity"] = actual_qty
+		item["stock_status"] = stock_status
+
+	# Fetch Ratings
+	# Served from the precomputed per-Website-Item summary (0-5 scale)
+	if wants(fields, *RATING_FIELDS):
+		item.update(get_rating_info(item_code))
 
 	# Add discount info if needed (placeholder)
 	item["discount_percent"] = 0
 
 	# Check if wished
-	item["wished"] = 0
-	if frappe.session.user and frappe.session.user != "Guest":
-		# Wishlist is stored in "Wishlist" doctype, with "Wishlist Item" as child table
-		# The parent of Wishlist Item is the user (name of Wishlist doc is usually the user)
-		if frappe.db.exists("Wishlist Item", {"parent": frappe.session.user, "item_code": real_item_code}):
-			item["wished"] = 1
-
-	item["website_specifications"] = frappe.db.get_all(
-		"Item Website Specification",
-		filters={'parent': item_code},
-		fields=['idx','label','custom_value']
-	)
-	slideshow = item.slideshow
-	item['slideshow_list'] = []
-	if slideshow:
-		item['slideshow_list']=frappe.db.get_all(
-			"Website Slideshow Item",
-			filters={'parent': slideshow},
-			fields=['idx', 'image', 'custom_render_video']
+	# Answered from the cached wishlist item codes of the session user
+	if wants(fields, "wished"):
+		item["wished"] = 0
+		if frappe.session.user and frappe.session.user != "Guest":
+			from frappe_utils.website_customization.api.wishlist import get_wishlist_item_codes
+			if real_item_code in get_wishlist_item_codes():
+				item["wished"] = 1
+
+	if wants(fields, "website_specifications"):
+		item["website_specifications"] = frappe.db.get_all(
+			"Item Website Specification",
+			filters={'parent': item_code},
+			fields=['idx','label','custom_value']
 		)
 
-	return item
+	if wants(fields, "slideshow_list"):
+		slideshow = item.slideshow
+		item['slideshow_list'] = []
+		if slideshow:
+			item['slideshow_list']=frappe.db.get_all(
+				"Website Slideshow Item",
+				filters={'parent': slideshow},
+				fields=['idx', 'image', 'custom_render_video']
+			)
+
+	# Resized WebP variants next to the original URLs, {width: url}, one query for all images
+	if wants(fields, "website_image_variants", "slideshow_list"):
+		slides = item.get("slideshow_list") or []
+		image_variants = get_image_variants([item.website_image] + [slide.image for slide in slides])
+		item["website_image_variants"] = image_variants.get(item.website_image) or {}
+		for slide in slides:
+			slide["image_variants"] = image_variants.get(slide.image) or {}
+
+	return project(item, fields)
 
 @frappe.whitelist(allow_guest=True)
-def get_product_reviews(item_code):
+def get_product_reviews(item_code, limit=20, cursor=None):
+	"""
+	Keyset-paginated reviews of a product, newest first.
+	Args:
+		item_code (str): Item code of the product
+		limit (int): Page size (capped at 100)
+		cursor (str): `next_cursor` of the previous page
+	Returns:
+		dict: {"reviews", "next_cursor", "summary"}, the rating summary only on the first page
+	"""
 	if "webshop" not in frappe.get_installed_apps():
-		return []
+		return {"reviews": [], "next_cursor": None, "summary": None}
 
-	website_item = frappe.db.get_value("Website Item", {"item_code": item_code}, "name")
-	if not website_item:
-		return []
+	limit = min(max(cint(limit), 1), 100)
+	values = {"item_code": item_code, "limit": limit + 1}
+	keyset_condition = ""
 
-	reviews = frappe.db.get_all(
-		"Item Review",
-		filters={"website_item": website_item},
-		fields=["name", "user", "review_title", "comment", "rating", "published_on", "creation"],
-		order_by="creation desc"
-	)
-	
-	return reviews
+	if cursor:
+		# Cursor is "<creation>|<name>" of the last review already sent
+		creation, _sep, name = str(cursor).partition("|")
+		try:
+			creation = get_datetime(creation)
+		except Exception:
+			creation = None
+		if not (creation and name):
+			frappe.throw("Invalid cursor")
+		values.update({"creation": creation, "name": name})
+		keyset_condition = """
+			AND (r.creation < %(creation)s
+				OR (r.creation = %(creation)s AND r.name < %(name)s))
+		"""
+
+	# Website Item is resolved in the same query instead of a separate lookup
+	reviews = frappe.db.sql(f"""
+		SELECT r.name, r.user, r.review_title, r.comment, r.rating, r.published_on, r.creation, r.website_item
+		FROM `tabItem Review` r
+		INNER JOIN `tabWebsite Item` wi ON wi.name = r.website_item
+		WHERE wi.item_code = %(item_code)s
+		{keyset_condition}
+		ORDER BY r.creation DESC, r.name DESC
+		LIMIT %(limit)s
+	""", values, as_dict=True)
+
+	next_cursor = None
+	if len(reviews) > limit:
+		reviews = reviews[:limit]
+		next_cursor = f"{reviews[-1].creation}|{reviews[-1].name}"
+
+	summary = None
+	if not cursor:
+		summary = get_rating_info(reviews[0].website_item if reviews else None)
+
+	return {
+		"reviews": reviews,
+		"next_cursor": next_cursor,
+		"summary": summary
+	}
 
 
 # ============================================================================
@@ -344,18 +510,111 @@ def _get_customer_from_user(user=None):
 	return customer
 
 
+RATE_TOLERANCE = 0.01
+
+# Website Quotations are saved with ignore_pricing_rule set: their lines were already
+# priced with the pricing rules in one batch (the rules are recorded per line), and
+# re-applying them line by line on save is the cost the batch avoids. Sales Orders made
+# from these Quotations keep the flag on purpose, so the customer is charged the quoted
+# rates. Set to 0 to let ERPNext re-apply pricing rules on every save instead.
+WEBSITE_QUOTATION_IGNORE_PRICING_RULE = 1
+
+
+def _price_cart_items(items, customer, company=None):
+	"""
+	Canonical prices for all cart lines in one batched pass: price list rates for every
+	item in one lookup, then pricing rules for every line in one apply_pricing_rule call.
+	Rates from the webshop fallback list in another currency are converted to the
+	customer price list currency. Returns the currency and one dict per line: item_code,
+	qty, price_list_rate, margin_type, margin_rate_or_amount, rate_with_margin,
+	discount_percentage, discount_amount, rate and the pricing_rules applied.
+	"""
+	from erpnext.accounts.doctype.pricing_rule.pricing_rule import apply_pricing_rule
+
+	price_list = get_customer_price_list(customer)
+	prices = resolve_prices([item.get("item_code") for item in items], customer, convert=True)
+	customer_group, territory = frappe.db.get_value("Customer", customer, ["customer_group", "territory"])
+	currency = frappe.get_cached_value("Price List", price_list, "currency") \
+		or next((price.currency for price in prices.values()), None)
+
+	lines = []
+	for idx, item in enumerate(items):
+		price = prices.get(item.get("item_code")) or {}
+		price_list_rate = flt(price.get("price_list_rate"))
+		qty = flt(item.get("qty", 1)) or 1
+		lines.append(frappe._dict({
+			"doctype": "Quotation Item",
+			"name": f"cart-line-{idx}",
+			"child_docname": f"cart-line-{idx}",
+			"item_code": item.get("item_code"),
+			"qty": qty,
+			"stock_qty": qty,
+			"conversion_factor": 1,
+			"price_list_rate": price_list_rate,
+			"pricing_rules": ""
+		}))
+
+	pricing = apply_pricing_rule(frappe._dict({
+		"items": lines,
+		"doctype": "Quotation",
+		"transaction_type": "selling",
+		"quotation_to": "Customer",
+		"party_name": customer,
+		"customer": customer,
+		"customer_group": customer_group,
+		"territory": territory,
+		"company": company or frappe.defaults.get_user_default("Company"),
+		"transaction_date": frappe.utils.nowdate(),
+		"currency": currency,
+		"conversion_rate": 1,
+		"price_list": price_list,
+		"price_list_currency": currency,
+		"plc_conversion_rate": 1,
+		"is_return": 0
+	})) or []
+	pricing = {d.get("child_docname"): d for d in pricing}
+
+	for line in lines:
+		rule = pricing.get(line.name) or {}
+		price_list_rate = flt(rule.get("price_list_rate")) or line.price_list_rate
+		rate_with_margin = price_list_rate
+		if rule.get("margin_type") == "Percentage":
+			rate_with_margin += price_list_rate * flt(rule.get("margin_rate_or_amount")) / 100
+		elif rule.get("margin_type") == "Amount":
+			rate_with_margin += flt(rule.get("margin_rate_or_amount"))
+
+		line.price_list_rate = price_list_rate
+		line.margin_type = rule.get("margin_type") or ""
+		line.margin_rate_or_amount = flt(rule.get("margin_rate_or_amount"))
+		line.rate_with_margin = rate_with_margin if line.margin_type else 0
+		line.discount_percentage = flt(rule.get("discount_percentage"))
+		line.discount_amount = flt(rule.get("discount_amount"))
+		# Same order as ERPNext's calculate_taxes_and_totals, so the saved rate matches:
+		# a percentage discount wins, an amount discount applies only without one
+		if line.discount_percentage:
+			line.rate = rate_with_margin * (1 - line.discount_percentage / 100)
+		else:
+			line.rate = max(rate_with_margin - line.discount_amount, 0)
+		line.pricing_rules = rule.get("pricing_rules") or ""
+
+	return currency, lines
+
+
 @frappe.whitelist()
-def sync_cart_to_quotation(items):
+def sync_cart_to_quotation(items, reject_stale_rates=0):
 	"""
 	Sync cart items to a Quotation.
 	Creates a new Quotation or updates existing Website-sourced Draft Quotation.
+	Rates are priced server side in one batched pass; client rates that differ are
+	overridden, or rejected when `reject_stale_rates` is set.
 	
 	Args:
 		items: JSON string or list of cart items with structure:
 			[{"item_code": "SKU001", "qty": 2, "rate": 100.0}, ...]
+		reject_stale_rates: Throw instead of overriding stale client rates
 	
 	Returns:
-		dict: {"quotation": "QTN-00001", "grand_total": 1234.56, ...}
+		dict: {"quotation": "QTN-00001", "grand_total": 1234.56, "items": [...], ...}
 	"""
 	# Parse items if string
 	if isinstance(items, str):
@@ -395,13 +654,39 @@ def sync_cart_to_quotation(items):
 			"transaction_date": frappe.utils.nowdate()
 		})
 	
+	# Canonical prices for every line, in one pass
+	currency, lines = _price_cart_items(items, customer, quotation.company)
+
+	stale = {
+		idx for idx, (item, line) in enumerate(zip(items, lines))
+		if item.get("rate") is not None and abs(flt(item.get("rate")) - line.rate) > RATE_TOLERANCE
+	}
+	if stale and cint(reject_stale_rates):
+		stale_items = ", ".join(lines[idx].item_code for idx in sorted(stale))
+		frappe.throw(f"Prices have changed for: {stale_items}. Please refresh your cart.")
+
+	# Pricing rules were applied above for all lines together, see WEBSITE_QUOTATION_IGNORE_PRICING_RULE
+	quotation.selling_price_list = get_customer_price_list(customer)
+	quotation.currency = currency
+	quotation.price_list_currency = currency
+	quotation.plc_conversion_rate = 1
+	quotation.ignore_pricing_rule = WEBSITE_QUOTATION_IGNORE_PRICING_RULE
+
 	# Add items from cart
-	for item in items:
+	delivery_date = frappe.utils.add_days(frappe.utils.nowdate(), 7)  # Default 7 days
+	for line in lines:
 		quotation.append("items", {
-			"item_code": item.get("item_code"),
-			"qty": item.get("qty", 1),
-			"rate": item.get("rate", 0.0),
-			"delivery_date": frappe.utils.add_days(frappe.utils.nowdate(), 7)  # Default 7 days
+			"item_code": line.item_code,
+			"qty": line.qty,
+			"price_list_rate": line.price_list_rate,
+			"margin_type": line.margin_type,
+			"margin_rate_or_amount": line.margin_rate_or_amount,
+			"rate_with_margin": line.rate_with_margin,
+			"discount_percentage": line.discount_percentage,
+			"discount_amount": line.discount_amount,
+			"rate": line.rate,
+			"pricing_rules": line.pricing_rules,
+			"delivery_date": delivery_date
 		})
 	
 	# Save
@@ -416,37 +701,195 @@ def sync_cart_to_quotation(items):
 		"quotation": quotation.name,
 		"grand_total": quotation.grand_total,
 		"total_qty": sum([item.qty for item in quotation.items]),
+		"items": [{
+			"item_code": row.item_code,
+			"qty": row.qty,
+			"price_list_rate": row.price_list_rate,
+			"discount_percentage": row.discount_percentage,
+			"rate": row.rate,
+			"amount": row.amount,
+			"client_rate": item.get("rate"),
+			"adjusted": idx in stale
+		} for idx, (item, row) in enumerate(zip(items, quotation.items))],
 		"message": "Cart synced successfully"
 	}
 
-
 	return addresses
 
+CITY_FIELDS = ["name", "city_name", "state", "country"]
+
+
+def _get_cities_version():
+	"""Version token of the City table, changes on any insert, edit or delete."""
+	count, modified = frappe.db.sql("SELECT COUNT(*), MAX(modified) FROM `tabCity`")[0]
+	return make_etag(count, modified)
+
+
+def _get_all_cities(version):
+	return get_cached(
+		f"frappe_utils:cities:{version}",
+		lambda: frappe.get_all("City", fields=CITY_FIELDS, order_by="city_name asc"),
+		expires_in_sec=24 * 60 * 60
+	)
+
+
 @frappe.whitelist()
 def get_cities():
 	"""
 	Fetch all cities for dropdown.
+	The list is served from a cached snapshot tagged with an ETag, so clients
+	revalidating with If-None-Match get a 304 until a City changes.
 	"""
-	return frappe.get_all("City", fields=["name", "city_name", "state", "country"])
+	version = _get_cities_version()
+	return respond_with_etag(version, lambda: _get_all_cities(version))
+
 
 @frappe.whitelist()
-def get_customer_addresses():
+def get_cities_snapshot(version=None):
+	"""
+	Versioned full city list for clients that keep it locally.
+	Args:
+		version (str): Version the client currently holds
+	Returns:
+		dict: {"version", "changed"} plus "cities" only when the client's version is stale
+	"""
+	current = _get_cities_version()
+	if version == current:
+		return {"version": current, "changed": 0}
+
+	return respond_with_etag(current, lambda: {
+		"version": current,
+		"changed": 1,
+		"cities": _get_all_cities(current)
+	})
+
+
+@frappe.whitelist()
+def search_cities(txt=None, state=None, country=None, limit=20):
+	"""
+	Prefix search over City names for typeahead dropdowns.
+	Args:
+		txt (str): Start of the city name
+		state (str): Optional state filter
+		country (str): Optional country filter
+		limit (int): Max results (capped at 100)
+	"""
+	filters = {}
+	if txt and txt.strip():
+		# typed % and _ are matched literally; backslash is the default LIKE escape character
+		prefix = txt.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+		filters["city_name"] = ["like", f"{prefix}%"]
+	if state:
+		filters["state"] = state
+	if country:
+		filters["country"] = country
+
+	return frappe.get_all(
+		"City",
+		filters=filters,
+		fields=CITY_FIELDS,
+		order_by="city_name asc",
+		limit_page_length=min(max(cint(limit), 1), 100)
+	)
+
+ADDRESS_FIELDS = [
+	"name", "address_title", "address_line1", "address_line2", "city", "state", "pincode",
+	"country", "phone", "email_id", "is_primary_address", "is_shipping_address"
+]
+
+
+ADDRESS_CACHE_TTL = 60 * 60
+ADDRESS_PAGE_LIMIT = 100
+# Deeper pages are rare and are read straight from the database
+ADDRESS_CACHED_PAGES = 10
+
+
+def _get_address_cache_key(customer):
+	return f"frappe_utils:customer_addresses:{customer}"
+
+
+def clear_customer_address_cache(customer):
+	"""
+	Drop every cached address page of the given customer once the transaction commits,
+	so a concurrent read can't cache the rows being replaced.
+	"""
+	frappe.db.after_commit.add(lambda: frappe.cache().delete_key(_get_address_cache_key(customer)))
+
+
+def on_address_change(doc, method=None):
+	"""
+	Address doc event: invalidate the address cache of every linked Customer,
+	before and after the change, so edits made from the desk are picked up as well.
+	"""
+	links = list(doc.get("links") or [])
+	if before := doc.get_doc_before_save():
+		links += before.get("links") or []
+
+	for customer in {link.link_name for link in links if link.link_doctype == "Customer" and link.link_name}:
+		clear_customer_address_cache(customer)
+
+
+def _fetch_customer_addresses(customer, prefer=None, page=1, limit=0):
+	"""
+	Addresses of a customer in a single Address <-> Dynamic Link join.
+	`prefer` ("primary" or "shipping") floats the matching address to the top.
+	"""
+	order_by = ["addr.modified DESC"]
+	if prefer == "primary":
+		order_by = ["addr.is_primary_address DESC", "addr.is_shipping_address DESC"] + order_by
+	elif prefer == "shipping":
+		order_by = ["addr.is_shipping_address DESC", "addr.is_primary_address DESC"] + order_by
+
+	limit_clause = ""
+	if limit:
+		limit_clause = "LIMIT %(limit)s OFFSET %(offset)s"
+
+	fields = ", ".join(f"addr.`{field}`" for field in ADDRESS_FIELDS)
+
+	return frappe.db.sql(f"""
+		SELECT {fields}
+		FROM `tabAddress` addr
+		INNER JOIN `tabDynamic Link` dl
+			ON dl.parent = addr.name
+			AND dl.parenttype = 'Address'
+		WHERE
+			dl.link_doctype = 'Customer'
+			AND dl.link_name = %(customer)s
+			AND addr.is_your_company_address = 0
+		ORDER BY {", ".join(order_by)}
+		{limit_clause}
+	""", {
+		"customer": customer,
+		"limit": limit,
+		"offset": (page - 1) * limit
+	}, as_dict=True)
+
+
+@frappe.whitelist()
+def get_customer_addresses(prefer=None, page=1, limit=0):
 	"""
 	Fetch addresses linked to the current user's customer.
+	Args:
+		prefer (str): "primary" or "shipping" to return that address first
+		page (int): 1-based page number, used together with `limit`
+		limit (int): Page size (at most 100), 0 returns all addresses
 	"""
 	customer = _get_customer_from_user()
-	
-	addresses = frappe.get_all(
-		"Address",
-		filters={
-			"is_your_company_address": 0
-		},
-		fields=["name", "address_title", "address_line1", "address_line2", "city", "state", "pincode", "country", "phone", "email_id", "is_primary_address", "is_shipping_address"],
-		or_filters={
-			"name": ["in", [d.parent for d in frappe.get_all("Dynamic Link", filters={"link_doctype": "Customer", "link_name": customer, "parenttype": "Address"}, fields=["parent"])]]
-		}
+
+	if prefer not in ("primary", "shipping"):
+		prefer = None
+	page = max(cint(page), 1)
+	limit = min(max(cint(limit), 0), ADDRESS_PAGE_LIMIT)
+
+	if limit and page > ADDRESS_CACHED_PAGES:
+		return _fetch_customer_addresses(customer, prefer, page, limit)
+
+	return get_cached(
+		_get_address_cache_key(customer),
+		lambda: _fetch_customer_addresses(customer, prefer, page, limit),
+		field=f"{prefer}:{page}:{limit}",
+		expires_in_sec=ADDRESS_CACHE_TTL
 	)
-	return addresses
 
 @frappe.whitelist()
 def create_customer_address(address_data):
@@ -467,6 +910,7 @@ def create_customer_address(address_data):
 		"link_name": customer
 	})
 	doc.insert(ignore_permissions=True)
+	clear_customer_address_cache(customer)
 	
 	return doc.name
 
@@ -489,6 +933,7 @@ def update_customer_address(address_name, address_data):
 	doc = frappe.get_doc("Address", address_name)
 	doc.update(address_data)
 	doc.save(ignore_permissions=True)
+	clear_customer_address_cache(customer)
 	return doc.name
 
 @frappe.whitelist()
@@ -502,6 +947,7 @@ def delete_customer_address(address_name):
 		frappe.throw("You do not have permission to delete this address")
 		
 	frappe.delete_doc("Address", address_name, ignore_permissions=True)
+	clear_customer_address_cache(customer)
 	return "Deleted"
 
 @frappe.whitelist()
@@ -597,6 +1043,8 @@ def place_order(quotation_name, address_name=None):
 			target.source = "Website"
 			target.delivery_date = frappe.utils.nowdate()
 			target.customer = source.party_name  # Explicitly set customer
+			# Charged at the quoted rates, see WEBSITE_QUOTATION_IGNORE_PRICING_RULE
+			target.ignore_pricing_rule = WEBSITE_QUOTATION_IGNORE_PRICING_RULE
 			
 			if address_name:
 				target.customer_address = address_name
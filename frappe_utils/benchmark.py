@@ -0,0 +1,313 @@
+"""
+Catalog benchmark suite.
+
+Seeds a synthetic catalog, measures latency percentiles and query counts of the
+hot storefront paths and writes a JSON report that can be compared between releases.
+Run it on a disposable site only, seeding writes straight into the tables:
+
+	bench --site test.localhost execute frappe_utils.benchmark.execute --kwargs "{'scale': 1000}"
+	bench --site test.localhost execute frappe_utils.benchmark.compare --args "['old.json', 'new.json']"
+"""
+
+import json
+import random
+import time
+from contextlib import contextmanager
+
+import frappe
+from frappe.utils import add_days, now, nowdate
+from frappe_utils.instrumentation import percentile
+
+import frappe_utils
+
+PREFIX = "BENCH-"
+SECTION = f"{PREFIX}Section"
+BATCH_SIZE = 1000
+
+
+def execute(scale=500, iterations=30, output=None, cleanup=1):
+	"""
+	Seeds `scale` products (with their Items, Bins, Item Prices, Work Orders, reviews and
+	wishlists), benchmarks every target `iterations` times and writes the JSON report.
+	"""
+	if "webshop" not in frappe.get_installed_apps():
+		print("webshop is not installed, nothing to benchmark.")
+		return
+
+	scale, iterations = int(scale), int(iterations)
+	try:
+		context = seed(scale)
+		setups = get_target_setups()
+		results = {
+			name: run(target, context, iterations, setup=setups.get(name))
+			for name, target in get_targets().items()
+		}
+	finally:
+		if int(cleanup):
+			clean()
+
+	report = {
+		"generated_at": now(),
+		"frappe_utils_version": frappe_utils.__version__,
+		"scale": scale,
+		"iterations": iterations,
+		"results": results,
+	}
+
+	output = output or frappe.get_site_path("private", "files", "frappe_utils_benchmark.json")
+	with open(output, "w") as f:
+		json.dump(report, f, indent=1)
+
+	for name, result in results.items():
+		print(f"{name:28} p50 {result['p50_ms']:9.2f} ms  p95 {result['p95_ms']:9.2f} ms  queries {result['queries']}")
+	print(f"\nReport written to {output}")
+	return report
+
+
+def compare(baseline, current):
+	"""Prints the p50/p95/query count change of every target between two reports."""
+	with open(baseline) as f:
+		baseline = json.load(f)["results"]
+	with open(current) as f:
+		current = json.load(f)["results"]
+
+	for name, result in current.items():
+		before = baseline.get(name)
+		if not before:
+			print(f"{name:28} (new)")
+			continue
+
+		changes = "  ".join(
+			f"{key} {before[key]} -> {result[key]} ({_change(before[key], result[key])})"
+			for key in ("p50_ms", "p95_ms", "queries")
+		)
+		print(f"{name:28} {changes}")
+
+
+def _change(before, after):
+	if not before:
+		return "n/a"
+	return f"{(after - before) / before * 100:+.1f}%"
+
+
+# Targets
+# -------
+
+def get_targets():
+	from frappe_utils.api import get_product_info, get_products_with_stock
+	from frappe_utils.tasks import daily_unpublish_job
+	from frappe_utils.website_customization.api.home import get_products_by_section
+	from frappe_utils.website_customization.api.wishlist import get_wishlist
+
+	return {
+		"get_products_with_stock": lambda ctx: get_products_with_stock(
+			query_args={"field_filters": {}, "attribute_filters": {}, "start": random.randrange(0, 200, 20)}
+		),
+		"get_product_info": lambda ctx: get_product_info(random.choice(ctx.website_items)),
+		"get_products_by_section": lambda ctx: get_products_by_section(),
+		"get_wishlist": lambda ctx: _as_user(random.choice(ctx.users), get_wishlist),
+		"daily_unpublish_job": lambda ctx: daily_unpublish_job(),
+	}
+
+
+def get_target_setups():
+	"""Untimed steps run before each iteration of a target, for targets that change the data they read."""
+	return {
+		# the job only flips flags that need flipping, so every run starts from the seeded state
+		"daily_unpublish_job": lambda ctx: _reset_published(),
+	}
+
+
+def run(target, context, iterations, setup=None):
+	"""Calls `target` repeatedly, the first call is reported separately as the cold run."""
+	timings, queries = [], []
+	for _ in range(iterations):
+		if setup:
+			setup(context)
+
+		with count_queries() as counter:
+			start = time.perf_counter()
+			target(context)
+			timings.append((time.perf_counter() - start) * 1000)
+		queries.append(counter["queries"])
+
+	cold, warm = timings[0], sorted(timings[1:] or timings)
+	return {
+		"cold_ms": round(cold, 2),
+		"p50_ms": round(percentile(warm, 50), 2),
+		"p95_ms": round(percentile(warm, 95), 2),
+		"p99_ms": round(percentile(warm, 99), 2),
+		"mean_ms": round(sum(warm) / len(warm), 2),
+		"queries": round(sum(queries[1:] or queries) / len(queries[1:] or queries), 1),
+		"cold_queries": queries[0],
+	}
+
+
+@contextmanager
+def count_queries():
+	"""Counts the SQL statements issued through frappe.db while the block runs."""
+	counter = {"queries": 0}
+	sql = frappe.db.sql
+
+	def counting_sql(*args, **kwargs):
+		counter["queries"] += 1
+		return sql(*args, **kwargs)
+
+	frappe.db.sql = counting_sql
+	try:
+		yield counter
+	finally:
+		frappe.db.sql = sql
+
+
+def _reset_published():
+	frappe.db.sql("UPDATE `tabWebsite Item` SET published = 1 WHERE name LIKE %s", f"{PREFIX}%")
+	frappe.db.commit()
+
+
+def _as_user(user, method):
+	current = frappe.session.user
+	frappe.set_user(user)
+	try:
+		return method()
+	finally:
+		frappe.set_user(current)
+
+
+# Synthetic data
+# --------------
+
+def seed(scale):
+	"""
+	Bulk inserts a synthetic catalog. Validations are skipped on purpose, so only
+	the columns the benchmarked code reads are filled in.
+	"""
+	clean()
+	random.seed(scale)
+
+	company = frappe.defaults.get_global_default("company") or frappe.db.get_value("Company", {}, "name")
+	warehouse = frappe.db.get_value("Warehouse", {"is_group": 0, "company": company}, "name")
+	price_list = frappe.db.get_single_value("Webshop Settings", "price_list") or "Standard Selling"
+	currency = frappe.db.get_value("Price List", price_list, "currency") or "INR"
+	item_group = frappe.db.get_value("Item Group", {"is_group": 0}, "name") or "All Item Groups"
+	has_section = frappe.db.has_column("Website Item", "custom_section")
+	timestamp = now()
+	common = {"creation": timestamp, "modified": timestamp, "owner": "Administrator", "modified_by": "Administrator"}
+
+	item_codes = [f"{PREFIX}ITEM-{i:06d}" for i in range(scale)]
+	users = [f"bench-user-{i}@example.com" for i in range(max(scale // 50, 1))]
+
+	_insert("Item", [{
+		"name": code, "item_code": code, "item_name": f"Bench Item {i}", "item_group": item_group,
+		"stock_uom": "Nos", "is_stock_item": 1, "is_sales_item": 1, "discontinued": int(i % 10 == 0),
+	} for i, code in enumerate(item_codes)], common)
+
+	website_items = []
+	for i, code in enumerate(item_codes):
+		row = {
+			"name": f"{PREFIX}WEB-{i:06d}", "item_code": code, "item_name": f"Bench Item {i}",
+			"web_item_name": f"Bench Item {i}", "item_group": item_group, "published": 1,
+			"route": f"bench/item-{i}", "website_warehouse": warehouse, "discontinued": int(i % 10 == 0),
+			"ranking": random.randint(0, 10), "stock_uom": "Nos",
+		}
+		if has_section:
+			row.update({"custom_section": SECTION if i % 5 == 0 else None, "custom_section_order": i})
+		website_items.append(row)
+	_insert("Website Item", website_items, common)
+
+	_insert("Bin", [{
+		"name": f"{PREFIX}BIN-{i:06d}", "item_code": code, "warehouse": warehouse,
+		"actual_qty": 0 if i % 4 == 0 else random.randint(1, 500), "projected_qty": 0, "stock_uom": "Nos",
+	} for i, code in enumerate(item_codes)], common)
+
+	_insert("Item Price", [{
+		"name": f"{PREFIX}PRICE-{i:06d}", "item_code": code, "price_list": price_list, "selling": 1,
+		"price_list_rate": random.randint(50, 5000), "currency": currency, "uom": "Nos",
+	} for i, code in enumerate(item_codes)], common)
+
+	_insert("Work Order", [{
+		"name": f"{PREFIX}WO-{i:06d}", "production_item": code, "company": company, "qty": 10,
+		"status": random.choice(["Not Started", "In Process", "Completed"]), "docstatus": 1,
+	} for i, code in enumerate(item_codes) if i % 8 == 0], common)
+
+	_insert("User", [{
+		"name": user, "email": user, "first_name": "Bench", "enabled": 1, "user_type": "Website User",
+	} for user in users], common)
+
+	_insert("Item Review", [{
+		"name": f"{PREFIX}REV-{i:07d}", "website_item": website_items[i % scale]["name"],
+		"user": users[i % len(users)], "rating": random.randint(1, 5) / 5, "review_title": "Bench review",
+		"comment": "Synthetic review", "published_on": add_days(nowdate(), -(i % 365)),
+	} for i in range(scale * 3)], common)
+
+	_insert("Wishlist", [{"name": user, "user": user} for user in users], common)
+	_insert("Wishlist Item", [{
+		"name": f"{PREFIX}WISH-{u:05d}-{i:03d}", "parent": user, "parenttype": "Wishlist",
+		"parentfield": "items", "idx": i + 1, "item_code": item_codes[(u * 37 + i) % scale],
+		"website_item": website_items[(u * 37 + i) % scale]["name"],
+	} for u, user in enumerate(users) for i in range(25)], common)
+
+	if has_section:
+		_add_home_section()
+
+	frappe.db.commit()
+	frappe.clear_cache()
+	_clear_app_cache()
+
+	return frappe._dict(website_items=[d["name"] for d in website_items], users=users)
+
+
+def _insert(doctype, rows, common):
+	if not rows:
+		return
+
+	fields = list(rows[0]) + list(common)
+	values = [tuple(row.get(field) for field in rows[0]) + tuple(common.values()) for row in rows]
+	for start in range(0, len(values), BATCH_SIZE):
+		frappe.db.bulk_insert(doctype, fields, values[start:start + BATCH_SIZE])
+
+
+def _add_home_section():
+	if not frappe.db.exists("Website Section", SECTION):
+		frappe.get_doc({"doctype": "Website Section", "section_name": SECTION}).insert(ignore_permissions=True)
+
+	settings = frappe.get_doc("Website Customization Settings")
+	if not any(row.section_name == SECTION for row in settings.section_setting):
+		settings.append("section_setting", {"section_name": SECTION, "order": 0, "is_active": 1})
+		settings.save(ignore_permissions=True)
+
+
+def clean():
+	"""Removes everything `seed` created."""
+	settings = frappe.get_doc("Website Customization Settings")
+	rows = [row for row in settings.section_setting if row.section_name != SECTION]
+	if len(rows) != len(settings.section_setting):
+		settings.section_setting = rows
+		settings.save(ignore_permissions=True)
+	frappe.db.delete("Website Section", {"name": SECTION})
+
+	for doctype in ("Wishlist Item", "Item Review", "Work Order", "Item Price", "Bin", "Website Item", "Item"):
+		frappe.db.delete(doctype, {"name": ["like", f"{PREFIX}%"]})
+	frappe.db.delete("Wishlist", {"name": ["like", "bench-user-%@example.com"]})
+	frappe.db.delete("User", {"name": ["like", "bench-user-%@example.com"]})
+
+	frappe.db.commit()
+	frappe.clear_cache()
+	_clear_app_cache()
+
+
+def _clear_app_cache():
+	"""
+	Resets the app's own Redis caches. Seeding and cleaning bypass the doc events that
+	keep them in sync, and frappe.clear_cache() leaves them alone, so a run would otherwise
+	depend on whatever ran before it.
+	"""
+	from frappe_utils.catalog import ITEM_PRICE_CACHE_KEY
+	from frappe_utils.ratings import RATING_SUMMARY_KEY
+	from frappe_utils.utils import rebuild_active_work_order_items
+
+	rebuild_active_work_order_items()
+
+	cache = frappe.cache()
+	for prefix in (ITEM_PRICE_CACHE_KEY, RATING_SUMMARY_KEY, "frappe_utils:wishlist:"):
+		cache.delete_keys(prefix)
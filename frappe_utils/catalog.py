@@ -0,0 +1,350 @@
+import json
+import pickle
+
+import frappe
+from frappe.utils import flt, fmt_money
+from frappe_utils.instrumentation import record_cache_lookup
+from frappe_utils.utils import get_active_work_order_items, get_cached, get_stock_status
+from frappe_utils.website_customization.doctype.website_image_variant.website_image_variant import get_image_variants
+
+CATALOG_ITEM_FIELDS = [
+	"name", "web_item_name", "item_name", "item_code", "website_image", "item_group",
+	"route", "short_description", "ranking", "on_backorder", "website_warehouse", "discontinued"
+]
+PRICE_FIELDS = ("price_list_rate", "currency", "formatted_price")
+STOCK_FIELDS = ("in_stock", "stock_qty", "is_stock_item", "total_quantity", "stock_status")
+
+
+def parse_fields(fields):
+	"""
+	`fields` projection argument of the catalog endpoints, given as a list, a JSON list
+	or a comma separated string. Returns a set of response keys, None for everything.
+	"""
+	if not fields:
+		return None
+
+	if isinstance(fields, str):
+		try:
+			parsed = json.loads(fields)
+		except ValueError:
+			parsed = None
+		fields = parsed if isinstance(parsed, list) else fields.split(",")
+
+	return {str(field).strip() for field in fields if str(field).strip()} or None
+
+
+def wants(fields, *keys):
+	"""Whether any of `keys` is part of the projection (always true without one)."""
+	return fields is None or any(key in fields for key in keys)
+
+
+def project(item, fields):
+	"""Trims `item` down to the requested keys."""
+	if fields is None:
+		return item
+	return frappe._dict({key: value for key, value in item.items() if key in fields})
+
+
+def get_catalog_items(item_codes, fields=None):
+	"""
+	Published Website Items for `item_codes` (in the given order) hydrated with price,
+	stock, stock status and WebP image variants using a fixed number of batched queries, independent of
+	the number of items. Discontinued items without stock or an active Work Order are dropped.
+	With a `fields` projection only the needed columns are read, price and stock are
+	looked up only when asked for, and the items are trimmed to those keys.
+	"""
+	item_codes = list(dict.fromkeys(item_codes))
+	if not item_codes:
+		return []
+
+	fields = parse_fields(fields)
+	columns = CATALOG_ITEM_FIELDS
+	if fields is not None:
+		columns = ["item_code", "discontinued"] + [
+			field for field in CATALOG_ITEM_FIELDS
+			if field in fields and field not in ("item_code", "discontinued")
+		]
+		if "website_image_variants" in fields and "website_image" not in columns:
+			columns.append("website_image")
+
+	web_items = frappe.get_all(
+		"Website Item",
+		filters={"item_code": ["in", item_codes], "published": 1},
+		fields=columns
+	)
+	web_items = {d.item_code: d for d in web_items}
+	item_codes = [code for code in item_codes if code in web_items]
+
+	with_price = wants(fields, *PRICE_FIELDS)
+	with_stock = wants(fields, *STOCK_FIELDS)
+
+	# Discontinued items always need stock for the visibility check
+	stock_codes = item_codes if with_stock else [code for code in item_codes if web_items[code].get("discontinued")]
+	prices = resolve_prices(item_codes) if with_price else {}
+	stock = get_stock_map(stock_codes) if stock_codes else {}
+	items_in_process = get_active_work_order_items(item_codes)
+	image_variants = {}
+	if wants(fields, "website_image_variants"):
+		image_variants = get_image_variants([web_items[code].website_image for code in item_codes])
+
+	items = []
+	for item_code in item_codes:
+		item = web_items[item_code]
+		stock_data = stock.get(item_code) or frappe._dict(in_stock=0, stock_qty=0.0, is_stock_item=0)
+		has_active_wo = item_code in items_in_process
+
+		if item.get("discontinued") and stock_data.stock_qty <= 0 and not has_active_wo:
+			continue
+
+		if with_price:
+			price = prices.get(item_code) or {}
+			item["price_list_rate"] = flt(price.get("price_list_rate"))
+			item["currency"] = price.get("currency")
+			item["formatted_price"] = fmt_money(item["price_list_rate"], currency=item["currency"]) if price else None
+
+		if with_stock:
+			item.update(stock_data)
+			item["total_quantity"] = stock_data.stock_qty
+			item["stock_status"] = get_stock_status(stock_data.is_stock_item, stock_data.stock_qty, has_active_wo)
+
+		if wants(fields, "website_image_variants"):
+			item["website_image_variants"] = image_variants.get(item.website_image) or {}
+
+		items.append(project(item, fields))
+
+	return items
+
+
+ITEM_PRICE_CACHE_KEY = "frappe_utils:item_prices"
+SESSION_CACHE_TTL = 5 * 60
+
+
+def get_webshop_price_list():
+	return frappe.db.get_single_value("Webshop Settings", "price_list") or "Standard Selling"
+
+
+def get_session_customer():
+	"""Customer of the logged in user (via Contact, then Portal User), None for guests."""
+	user = frappe.session.user
+	if not user or user == "Guest":
+		return None
+
+	def lookup():
+		customer = frappe.db.sql("""
+			SELECT dl.link_name
+			FROM `tabContact` c
+			INNER JOIN `tabDynamic Link` dl
+				ON dl.parent = c.name
+				AND dl.parenttype = 'Contact'
+				AND dl.link_doctype = 'Customer'
+			WHERE c.user = %s
+			LIMIT 1
+		""", user)
+		if customer:
+			return customer[0][0]
+
+		return frappe.db.get_value("Portal User", {"user": user, "parenttype": "Customer"}, "parent") or ""
+
+	return get_cached(f"frappe_utils:session_customer:{user}", lookup, expires_in_sec=SESSION_CACHE_TTL) or None
+
+
+def get_customer_price_list(customer=None):
+	"""Price list of the customer (or its Customer Group), falling back to the webshop price list."""
+	if not customer:
+		return get_webshop_price_list()
+
+	def lookup():
+		price_list, customer_group = frappe.db.get_value(
+			"Customer", customer, ["default_price_list", "customer_group"]
+		) or (None, None)
+		if not price_list and customer_group:
+			price_list = frappe.get_cached_value("Customer Group", customer_group, "default_price_list")
+		return price_list or ""
+
+	return get_cached(
+		f"frappe_utils:customer_price_list:{customer}", lookup, expires_in_sec=SESSION_CACHE_TTL
+	) or get_webshop_price_list()
+
+
+def resolve_prices(item_codes, customer=None, convert=False):
+	"""
+	Rate and currency of `item_codes` for `customer` (the session customer by default):
+	their own price list first, the webshop price list for items it doesn't price.
+	With `convert`, fallback rates in another currency are converted to the customer
+	price list currency, so every rate can be compared and summed as is.
+	Returns {item_code: {"price_list_rate", "currency", "price_list"}}.
+	"""
+	if customer is None:
+		customer = get_session_customer()
+
+	webshop_price_list = get_webshop_price_list()
+	price_list = get_customer_price_list(customer)
+
+	prices = get_price_map(item_codes, price_list)
+	missing = [code for code in item_codes if code not in prices]
+	if missing and price_list != webshop_price_list:
+		fallback = get_price_map(missing, webshop_price_list)
+		if convert:
+			fallback = convert_prices(fallback, frappe.get_cached_value("Price List", price_list, "currency"))
+		prices.update(fallback)
+
+	return prices
+
+
+def convert_prices(prices, currency):
+	"""
+	Copies of `prices` with the rates in another currency converted to `currency`,
+	with one exchange rate lookup per source currency.
+	"""
+	if not currency:
+		return prices
+
+	from erpnext.setup.utils import get_exchange_rate
+
+	exchange_rates = {currency: 1}
+	converted = {}
+	for item_code, price in prices.items():
+		if price.get("currency") and price.get("currency") not in exchange_rates:
+			exchange_rates[price.get("currency")] = flt(get_exchange_rate(price.get("currency"), currency)) or 1
+
+		converted[item_code] = frappe._dict(
+			price,
+			price_list_rate=flt(price.get("price_list_rate")) * exchange_rates.get(price.get("currency"), 1),
+			currency=currency
+		)
+
+	return converted
+
+
+def get_price_map(item_codes, price_list):
+	"""
+	Item Price rate and currency of `item_codes` in `price_list`.
+	Read from a per-price-list Redis hash in one round trip; items not cached yet
+	are fetched in one query. Items without a price are cached as such too.
+	"""
+	item_codes = list(dict.fromkeys(item_codes))
+	if not item_codes:
+		return {}
+
+	cache = frappe.cache()
+	key = cache.make_key(f"{ITEM_PRICE_CACHE_KEY}:{price_list}")
+
+	prices, missing = {}, []
+	for item_code, value in zip(item_codes, cache.hmget(key, item_codes)):
+		if value is None:
+			missing.append(item_code)
+		elif value := pickle.loads(value):
+			prices[item_code] = value
+
+	record_cache_lookup(not missing)
+	if not missing:
+		return prices
+
+	fetched = {
+		d.item_code: d
+		for d in frappe.get_all(
+			"Item Price",
+			filters={"item_code": ["in", missing], "price_list": price_list, "selling": 1},
+			fields=["item_code", "price_list_rate", "currency", "price_list"],
+			order_by="valid_from asc"
+		)
+	}
+	pipeline = cache.pipeline()
+	for item_code in missing:
+		pipeline.hset(key, item_code, pickle.dumps(fetched.get(item_code) or {}))
+	pipeline.execute()
+
+	prices.update(fetched)
+	return prices
+
+
+def clear_item_price_cache(price_list, item_code):
+	frappe.cache().hdel(f"{ITEM_PRICE_CACHE_KEY}:{price_list}", item_code)
+
+
+def on_item_price_change(doc, method=None):
+	"""Item Price doc event: drops the cached rate, and the old one if item or list changed."""
+	clear_item_price_cache(doc.price_list, doc.item_code)
+
+	before = doc.get_doc_before_save() if method != "after_delete" else None
+	if before and (before.price_list, before.item_code) != (doc.price_list, doc.item_code):
+		clear_item_price_cache(before.price_list, before.item_code)
+
+
+def get_stock_map(item_codes, warehouse=None):
+	"""
+	Stock of many items in the shape of webshop's get_web_item_qty_in_stock
+	({"in_stock", "stock_qty", "is_stock_item"}), from one Bin query.
+	Each item is counted in `warehouse`, or its Website Item warehouse (falling back
+	to the template's), with group warehouses expanded to their children.
+	Batch expiry adjustments done by webshop for single items are not applied here.
+	"""
+	if not item_codes:
+		return {}
+
+	items = frappe.db.sql("""
+		SELECT i.name AS item_code, i.is_stock_item, i.variant_of, wi.website_warehouse
+		FROM `tabItem` i
+		LEFT JOIN `tabWebsite Item` wi ON wi.item_code = i.name
+		WHERE i.name IN %(item_codes)s
+	""", {"item_codes": tuple(item_codes)}, as_dict=True)
+
+	if not warehouse:
+		templates = {d.variant_of for d in items if not d.website_warehouse and d.variant_of}
+		template_warehouses = {}
+		if templates:
+			template_warehouses = dict(frappe.get_all(
+				"Website Item",
+				filters={"item_code": ["in", list(templates)]},
+				fields=["item_code", "website_warehouse"],
+				as_list=True
+			))
+		for d in items:
+			d.website_warehouse = d.website_warehouse or template_warehouses.get(d.variant_of)
+
+	item_warehouses = {}
+	expanded = {}
+	for d in items:
+		item_warehouse = warehouse or d.website_warehouse
+		if item_warehouse not in expanded:
+			expanded[item_warehouse] = _expand_warehouse(item_warehouse)
+		item_warehouses[d.item_code] = expanded[item_warehouse]
+
+	all_warehouses = {wh for warehouses in expanded.values() for wh in warehouses}
+	bin_qty = {}
+	if all_warehouses:
+		bins = frappe.db.sql("""
+			SELECT
+				b.item_code,
+				b.warehouse,
+				GREATEST(b.actual_qty - b.reserved_qty - b.reserved_qty_for_production - b.reserved_qty_for_sub_contract, 0)
+					/ IFNULL(c.conversion_factor, 1) AS stock_qty
+			FROM `tabBin` b
+			INNER JOIN `tabItem` i ON i.name = b.item_code
+			LEFT JOIN `tabUOM Conversion Detail` c ON c.uom = i.sales_uom AND c.parent = i.name
+			WHERE b.item_code IN %(item_codes)s AND b.warehouse IN %(warehouses)s
+		""", {"item_codes": tuple(item_codes), "warehouses": tuple(all_warehouses)}, as_dict=True)
+		for d in bins:
+			bin_qty[(d.item_code, d.warehouse)] = flt(d.stock_qty)
+
+	stock = {}
+	for d in items:
+		stock_qty = sum(bin_qty.get((d.item_code, wh), 0.0) for wh in item_warehouses[d.item_code])
+		stock[d.item_code] = frappe._dict({
+			"in_stock": 1 if stock_qty > 0 else 0,
+			"stock_qty": stock_qty,
+			"is_stock_item": d.is_stock_item
+		})
+
+	return stock
+
+
+def _expand_warehouse(warehouse):
+	if not warehouse:
+		return []
+
+	if frappe.get_cached_value("Warehouse", warehouse, "is_group"):
+		from erpnext.stock.doctype.warehouse.warehouse import get_child_warehouses
+		return get_child_warehouses(warehouse)
+
+	return [warehouse]
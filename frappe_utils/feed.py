@@ -0,0 +1,223 @@
+import csv
+import json
+import os
+
+import frappe
+from frappe import _
+from frappe.utils import cint, flt, get_datetime, get_url, now_datetime, strip_html_tags
+from frappe_utils.catalog import get_price_map, get_stock_map, get_webshop_price_list
+from frappe_utils.utils import get_active_work_order_items, get_stock_status
+
+FEED_CHUNK_SIZE = 500
+FEED_FORMATS = ("ndjson", "csv")
+FEED_LAST_RUN_KEY = "frappe_utils:product_feed_last_run"
+FEED_COLUMNS = [
+	"id", "title", "description", "link", "image_link", "product_type",
+	"price", "currency", "availability", "stock_status", "quantity", "updated"
+]
+
+# Marketplace availability values for the storefront stock labels
+AVAILABILITY = {
+	"In Stock": "in_stock",
+	"In Process": "backorder",
+	"Out of Stock": "out_of_stock",
+}
+
+
+def iter_feed_rows(since=None, chunk_size=FEED_CHUNK_SIZE):
+	"""
+	Yields one feed row per published Website Item, walking them by name in keyset
+	chunks. Price, stock and Work Order state are joined per chunk with batched lookups,
+	so memory stays bounded by the chunk size whatever the catalog size.
+	With `since`, only items whose Website Item, Item Price or Bin changed after it are yielded,
+	published or not: items that were unpublished, discontinued or deleted since then come
+	out as out of stock, so marketplaces applying the delta stop listing them.
+	"""
+	price_list = get_webshop_price_list()
+	values = {"last": "", "limit": cint(chunk_size) or FEED_CHUNK_SIZE, "since": since}
+	condition = "wi.published = 1"
+	if since:
+		condition = """(wi.modified >= %(since)s
+				OR EXISTS (SELECT 1 FROM `tabItem Price` ip WHERE ip.item_code = wi.item_code AND ip.modified >= %(since)s)
+				OR EXISTS (SELECT 1 FROM `tabBin` b WHERE b.item_code = wi.item_code AND b.modified >= %(since)s))"""
+
+	while True:
+		web_items = frappe.db.sql(f"""
+			SELECT
+				wi.name, wi.item_code, wi.web_item_name, wi.short_description, wi.route,
+				wi.website_image, wi.item_group, wi.discontinued, wi.published, wi.modified
+			FROM `tabWebsite Item` wi
+			WHERE {condition} AND wi.name > %(last)s
+			ORDER BY wi.name
+			LIMIT %(limit)s
+		""", values, as_dict=True)
+
+		if not web_items:
+			break
+
+		item_codes = [d.item_code for d in web_items]
+		prices = get_price_map(item_codes, price_list)
+		stock = get_stock_map(item_codes)
+		items_in_process = get_active_work_order_items(item_codes)
+
+		for item in web_items:
+			stock_data = stock.get(item.item_code) or frappe._dict(stock_qty=0.0, is_stock_item=0)
+			has_active_wo = item.item_code in items_in_process
+			if not item.published or (item.discontinued and stock_data.stock_qty <= 0 and not has_active_wo):
+				# only deltas carry delisted items; the full feed just leaves them out
+				if since:
+					yield _get_delisted_row(item.item_code, item.web_item_name, item.modified)
+				continue
+
+			stock_status = get_stock_status(stock_data.is_stock_item, stock_data.stock_qty, has_active_wo)
+			price = prices.get(item.item_code) or {}
+			yield {
+				"id": item.item_code,
+				"title": item.web_item_name,
+				"description": strip_html_tags(item.short_description or ""),
+				"link": get_url(f"/{item.route}") if item.route else None,
+				"image_link": get_url(item.website_image) if item.website_image else None,
+				"product_type": item.item_group,
+				"price": flt(price.get("price_list_rate")),
+				"currency": price.get("currency"),
+				"availability": AVAILABILITY[stock_status],
+				"stock_status": stock_status,
+				"quantity": flt(stock_data.stock_qty),
+				"updated": str(item.modified)
+			}
+
+		values["last"] = web_items[-1].name
+		if len(web_items) < values["limit"]:
+			break
+
+	if since:
+		for deleted in frappe.get_all(
+			"Deleted Document",
+			filters={"deleted_doctype": "Website Item", "creation": [">=", since]},
+			fields=["data", "creation"],
+			order_by="creation"
+		):
+			data = json.loads(deleted.data or "{}")
+			if data.get("item_code"):
+				yield _get_delisted_row(data["item_code"], data.get("web_item_name"), deleted.creation)
+
+
+def _get_delisted_row(item_code, title, updated):
+	"""Delta row for an item the shop no longer sells: out of stock, without price."""
+	return {
+		"id": item_code,
+		"title": title,
+		"description": None,
+		"link": None,
+		"image_link": None,
+		"product_type": None,
+		"price": None,
+		"currency": None,
+		"availability": AVAILABILITY["Out of Stock"],
+		"stock_status": "Out of Stock",
+		"quantity": 0.0,
+		"updated": str(updated)
+	}
+
+
+def write_feed(rows, file, format="ndjson"):
+	"""Writes feed rows to a text file object as they come; returns the row count."""
+	count = 0
+	if format == "csv":
+		writer = csv.DictWriter(file, fieldnames=FEED_COLUMNS)
+		writer.writeheader()
+		for row in rows:
+			writer.writerow(row)
+			count += 1
+	else:
+		for row in rows:
+			file.write(json.dumps(row, default=str) + "\n")
+			count += 1
+
+	return count
+
+
+def get_feed_path(format="ndjson", delta=False):
+	folder = frappe.get_site_path("private", "feeds")
+	os.makedirs(folder, exist_ok=True)
+	return os.path.join(folder, f"products{'.delta' if delta else ''}.{format}")
+
+
+def export_feed(format="ndjson", since=None):
+	"""
+	Writes the product feed file (the delta file with `since`). The file is built next
+	to the current one and swapped in, so downloads never see a partial feed.
+	"""
+	if format not in FEED_FORMATS:
+		frappe.throw(_("Unsupported feed format: {0}").format(format))
+
+	path = get_feed_path(format, delta=bool(since))
+	tmp_path = f"{path}.{os.getpid()}.tmp"
+	with open(tmp_path, "w", newline="", encoding="utf-8") as file:
+		count = write_feed(iter_feed_rows(since=since), file, format)
+
+	os.replace(tmp_path, path)
+	return count
+
+
+def generate_product_feeds():
+	"""Daily full export of every feed format."""
+	started = now_datetime()
+	for format in FEED_FORMATS:
+		export_feed(format)
+
+	frappe.cache().set_value(FEED_LAST_RUN_KEY, str(started))
+
+
+def update_product_feeds():
+	"""
+	Hourly incremental export: the delta files hold the items changed since the previous
+	run. Falls back to a full export when there is no previous run to diff against.
+	"""
+	last_run = frappe.cache().get_value(FEED_LAST_RUN_KEY)
+	if not last_run:
+		return generate_product_feeds()
+
+	started = now_datetime()
+	for format in FEED_FORMATS:
+		export_feed(format, since=get_datetime(last_run))
+
+	frappe.cache().set_value(FEED_LAST_RUN_KEY, str(started))
+
+
+@frappe.whitelist(allow_guest=True)
+def get_product_feed(format="ndjson", delta=0):
+	"""
+	Serves the last exported feed file in blocks, without loading it in memory.
+	Args:
+		format (str): "ndjson" or "csv"
+		delta (int): Serve the items changed in the last incremental run only
+	"""
+	if format not in FEED_FORMATS:
+		frappe.throw(_("Unsupported feed format: {0}").format(format))
+
+	path = get_feed_path(format, delta=cint(delta))
+	if not os.path.exists(path):
+		raise frappe.DoesNotExistError(_("The product feed has not been generated yet"))
+
+	# Opened up front: a concurrent export swaps the path, not this file
+	file = open(path, "rb")
+
+	def read_blocks():
+		with file:
+			while block := file.read(64 * 1024):
+				yield block
+
+	from werkzeug.wrappers import Response
+	return Response(
+		read_blocks(),
+		mimetype="application/x-ndjson" if format == "ndjson" else "text/csv",
+		headers={"Content-Length": str(os.fstat(file.fileno()).st_size)}
+	)
+
+
+@frappe.whitelist()
+def regenerate_product_feed(format="ndjson", since=None):
+	"""Exports a feed right away (Website Manager only); returns the number of rows."""
+	frappe.only_for(("Website Manager", "System Manager"))
+	return export_feed(format, since=get_datetime(since) if since else None)
@@ -145,12 +145,81 @@ app_license = "mit"
 # 	}
 # }
 
+doc_events = {
+	"Address": {
+		"on_update": "frappe_utils.api.on_address_change",
+		"on_trash": "frappe_utils.api.on_address_change",
+	},
+	"Website Item": {
+		"on_update": [
+			"frappe_utils.website_customization.api.home.on_website_item_change",
+			"frappe_utils.search.on_website_item_change",
+			"frappe_utils.website_customization.doctype.website_image_variant.website_image_variant.on_website_item_change",
+		],
+		"after_delete": [
+			"frappe_utils.website_customization.api.home.on_website_item_change",
+			"frappe_utils.search.on_website_item_change",
+		],
+	},
+	"Website Slideshow": {
+		"on_update": "frappe_utils.website_customization.doctype.website_image_variant.website_image_variant.on_website_slideshow_change",
+	},
+	"Email Group Member": {
+		"on_update": "frappe_utils.website_customization.api.subscribe.on_email_group_member_change",
+		"on_trash": "frappe_utils.website_customization.api.subscribe.on_email_group_member_change",
+	},
+	"User": {
+		"on_update": "frappe_utils.website_customization.api.reset_password.on_user_change",
+	},
+	"Wishlist": {
+		"on_update": "frappe_utils.website_customization.api.wishlist.on_wishlist_change",
+	},
+	"Work Order": {
+		"on_change": "frappe_utils.utils.on_work_order_change",
+		"after_delete": "frappe_utils.utils.on_work_order_change",
+	},
+	"Item Price": {
+		"on_update": "frappe_utils.catalog.on_item_price_change",
+		"after_delete": "frappe_utils.catalog.on_item_price_change",
+	},
+	"Sales Invoice": {
+		"on_submit": "frappe_utils.website_customization.doctype.customer_financial_summary.customer_financial_summary.on_sales_invoice_change",
+		"on_cancel": "frappe_utils.website_customization.doctype.customer_financial_summary.customer_financial_summary.on_sales_invoice_change",
+	},
+	"Payment Entry": {
+		"on_submit": "frappe_utils.website_customization.doctype.customer_financial_summary.customer_financial_summary.on_payment_entry_change",
+		"on_cancel": "frappe_utils.website_customization.doctype.customer_financial_summary.customer_financial_summary.on_payment_entry_change",
+	},
+	"Journal Entry": {
+		"on_submit": "frappe_utils.website_customization.doctype.customer_financial_summary.customer_financial_summary.on_journal_entry_change",
+		"on_cancel": "frappe_utils.website_customization.doctype.customer_financial_summary.customer_financial_summary.on_journal_entry_change",
+	},
+	"Customer": {
+		"on_update": "frappe_utils.website_customization.doctype.customer_financial_summary.customer_financial_summary.on_customer_update",
+	},
+	"Item Review": {
+		"after_insert": "frappe_utils.ratings.on_item_review_insert",
+		"on_update": "frappe_utils.ratings.on_item_review_update",
+		"on_trash": "frappe_utils.ratings.on_item_review_trash",
+	},
+}
+
 # Scheduled Tasks
 # ---------------
 
 scheduler_events = {
+	"all": [
+		"frappe_utils.website_customization.api.subscribe.flush_pending_subscriptions"
+	],
+	"hourly": [
+		"frappe_utils.utils.rebuild_active_work_order_items",
+		"frappe_utils.feed.update_product_feeds"
+	],
 	"daily": [
-		"frappe_utils.tasks.daily_unpublish_job"
+		"frappe_utils.tasks.daily_unpublish_job",
+		"frappe_utils.search.rebuild_search_index",
+		"frappe_utils.feed.generate_product_feeds",
+		"frappe_utils.website_customization.doctype.customer_financial_summary.customer_financial_summary.reconcile_financial_summaries"
 	],
 }
 
@@ -184,8 +253,11 @@ scheduler_events = {
 
 # Request Events
 # ----------------
-# before_request = ["frappe_utils.utils.before_request"]
-# after_request = ["frappe_utils.utils.after_request"]
+before_request = ["frappe_utils.instrumentation.before_request"]
+after_request = [
+	"frappe_utils.utils.apply_response_headers",
+	"frappe_utils.instrumentation.after_request",
+]
 
 # Job Events
 # ----------
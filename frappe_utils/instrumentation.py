@@ -0,0 +1,157 @@
+import json
+import time
+
+import frappe
+from frappe.utils import cint, flt
+
+# Whitelisted methods under these paths are instrumented
+INSTRUMENTED_PREFIXES = ("frappe_utils.api.", "frappe_utils.website_customization.api.")
+METRICS_KEY = "frappe_utils:endpoint_metrics"
+METHODS_KEY = "frappe_utils:endpoint_metrics:methods"
+# Samples kept per method for the rolling percentiles
+WINDOW_SIZE = 1000
+
+
+def is_enabled():
+	"""Opt-in through site config: `bench --site x set-config frappe_utils_instrumentation 1`"""
+	return cint(frappe.conf.get("frappe_utils_instrumentation"))
+
+
+def before_request():
+	if not is_enabled():
+		return
+
+	method = _get_method()
+	if not method or not method.startswith(INSTRUMENTED_PREFIXES):
+		return
+
+	metrics = frappe._dict(method=method, queries=0, db_ms=0.0, cache_hits=0, cache_misses=0)
+	sql = frappe.db.sql
+
+	def timed_sql(*args, **kwargs):
+		start = time.perf_counter()
+		try:
+			return sql(*args, **kwargs)
+		finally:
+			metrics.queries += 1
+			metrics.db_ms += (time.perf_counter() - start) * 1000
+
+	metrics.sql = sql
+	metrics.start = time.perf_counter()
+	frappe.db.sql = timed_sql
+	frappe.local.frappe_utils_metrics = metrics
+
+
+def after_request(response=None, request=None):
+	metrics = getattr(frappe.local, "frappe_utils_metrics", None)
+	if not metrics:
+		return
+
+	frappe.local.frappe_utils_metrics = None
+	if frappe.db:
+		frappe.db.sql = metrics.sql
+
+	sample = {
+		"ms": round((time.perf_counter() - metrics.start) * 1000, 2),
+		"queries": metrics.queries,
+		"db_ms": round(metrics.db_ms, 2),
+		"cache_hits": metrics.cache_hits,
+		"cache_misses": metrics.cache_misses,
+	}
+
+	try:
+		cache = frappe.cache()
+		key = f"{METRICS_KEY}:{metrics.method}"
+		cache.lpush(key, json.dumps(sample))
+		cache.ltrim(key, 0, WINDOW_SIZE - 1)
+		cache.sadd(METHODS_KEY, metrics.method)
+	except Exception:
+		# Metrics must never break the request they describe
+		frappe.logger("frappe_utils").exception("Could not record endpoint metrics")
+
+	slow_call_ms = flt(frappe.conf.get("frappe_utils_slow_call_ms"))
+	if slow_call_ms and sample["ms"] >= slow_call_ms:
+		frappe.logger("frappe_utils.slow_calls").warning(json.dumps({
+			"method": metrics.method,
+			"args": _get_safe_args(),
+			**sample
+		}, default=str))
+
+
+def record_cache_lookup(hit):
+	"""Counts a cache hit or miss against the request being instrumented, if any."""
+	metrics = getattr(frappe.local, "frappe_utils_metrics", None)
+	if metrics:
+		if hit:
+			metrics.cache_hits += 1
+		else:
+			metrics.cache_misses += 1
+
+
+def _get_method():
+	request = getattr(frappe.local, "request", None)
+	if request and request.path.startswith("/api/method/"):
+		return request.path[len("/api/method/"):]
+
+	return frappe.form_dict.get("cmd")
+
+
+def _get_safe_args():
+	return {
+		key: "*****" if "password" in key.lower() else value
+		for key, value in frappe.form_dict.items()
+		if key != "cmd"
+	}
+
+
+@frappe.whitelist()
+def get_endpoint_metrics(method=None):
+	"""
+	Rolling latency percentiles, query counts, DB time and cache hit ratio
+	per instrumented method, over its last WINDOW_SIZE calls.
+	"""
+	frappe.only_for("System Manager")
+
+	cache = frappe.cache()
+	methods = [method] if method else sorted(m.decode() if isinstance(m, bytes) else m for m in cache.smembers(METHODS_KEY))
+
+	result = {}
+	for name in methods:
+		samples = [json.loads(s) for s in cache.lrange(f"{METRICS_KEY}:{name}", 0, -1)]
+		if not samples:
+			continue
+
+		latencies = sorted(s["ms"] for s in samples)
+		lookups = sum(s["cache_hits"] + s["cache_misses"] for s in samples)
+		result[name] = {
+			"calls": len(samples),
+			"p50_ms": round(percentile(latencies, 50), 2),
+			"p95_ms": round(percentile(latencies, 95), 2),
+			"p99_ms": round(percentile(latencies, 99), 2),
+			"avg_queries": round(sum(s["queries"] for s in samples) / len(samples), 1),
+			"avg_db_ms": round(sum(s["db_ms"] for s in samples) / len(samples), 2),
+			"cache_hit_ratio": round(sum(s["cache_hits"] for s in samples) / lookups, 3) if lookups else None,
+		}
+
+	return result
+
+
+@frappe.whitelist()
+def clear_endpoint_metrics():
+	frappe.only_for("System Manager")
+
+	cache = frappe.cache()
+	for name in cache.smembers(METHODS_KEY):
+		cache.delete_value(f"{METRICS_KEY}:{name.decode() if isinstance(name, bytes) else name}")
+	cache.delete_value(METHODS_KEY)
+
+
+def percentile(values, rank):
+	"""
+	Linearly interpolated percentile of sorted `values`. Shared with the benchmark
+	report, so p95 means the same thing in both.
+	"""
+	index = (len(values) - 1) * rank / 100
+	lower = int(index)
+	upper = min(lower + 1, len(values) - 1)
+	return values[lower] + (values[upper] - values[lower]) * (index - lower)
@@ -0,0 +1,9 @@
+import frappe
+
+def execute():
+	if not frappe.db.table_exists("City"):
+		return
+
+	# Prefix search on the name alone, and within a country/state
+	frappe.db.add_index("City", ["city_name"])
+	frappe.db.add_index("City", ["country", "state", "city_name"], "country_state_city_name_index")
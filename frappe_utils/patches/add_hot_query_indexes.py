@@ -0,0 +1,90 @@
+import frappe
+
+# Composite indexes for the queries frappe_utils issues on every storefront request
+HOT_QUERY_INDEXES = [
+	("Work Order", ["production_item", "status", "docstatus"], "production_item_status_index"),
+	("Website Item", ["discontinued"], "discontinued_index"),
+	("Website Item", ["custom_section"], "custom_section_index"),
+	("Wishlist Item", ["parent", "item_code"], "parent_item_code_index"),
+	("Item Review", ["website_item"], "website_item_index"),
+	("Dynamic Link", ["link_doctype", "link_name", "parenttype"], "link_doctype_name_parenttype_index"),
+	("Quotation", ["party_name", "docstatus", "source", "modified"], "party_docstatus_source_index"),
+]
+
+# The statements behind those indexes, with placeholder values for EXPLAIN
+HOT_QUERIES = [
+	("Active Work Order of an item", """
+		SELECT name FROM `tabWork Order`
+		WHERE production_item = %(value)s AND status NOT IN ('Completed', 'Cancelled') AND docstatus IN (0, 1)
+		LIMIT 1
+	"""),
+	("Discontinued Website Items", """
+		SELECT name, item_code, published FROM `tabWebsite Item` WHERE discontinued = 1
+	"""),
+	("Website Items of a section", """
+		SELECT name, item_code FROM `tabWebsite Item` WHERE custom_section = %(value)s
+	"""),
+	("Wishlist membership", """
+		SELECT name FROM `tabWishlist Item` WHERE parent = %(value)s AND item_code = %(value)s
+	"""),
+	("Reviews of a Website Item", """
+		SELECT name, rating FROM `tabItem Review` WHERE website_item = %(value)s
+	"""),
+	("Addresses of a Customer", """
+		SELECT parent FROM `tabDynamic Link`
+		WHERE link_doctype = 'Customer' AND link_name = %(value)s AND parenttype = 'Address'
+	"""),
+	("Website Quotation of a Customer", """
+		SELECT name FROM `tabQuotation`
+		WHERE party_name = %(value)s AND docstatus = 0 AND source = 'Website'
+		ORDER BY modified DESC
+		LIMIT 1
+	"""),
+]
+
+
+def execute():
+	explain_hot_queries("Before")
+
+	for doctype, columns, index_name in HOT_QUERY_INDEXES:
+		# custom_section and Work Order come from fixtures / other apps and may be missing
+		if not frappe.db.table_exists(doctype):
+			continue
+		if not all(frappe.db.has_column(doctype, column) for column in columns):
+			continue
+
+		# add_index skips indexes that already exist by name, so re-running is safe
+		frappe.db.add_index(doctype, columns, index_name)
+
+	explain_hot_queries("After")
+
+
+def explain_hot_queries(label=None):
+	"""
+	Prints the EXPLAIN plan of each hot query: access type, chosen index and estimated rows.
+	Run it directly with `bench --site <site> execute frappe_utils.patches.add_hot_query_indexes.explain_hot_queries`.
+	"""
+	if label:
+		print(f"{label}:")
+
+	plans = []
+	for title, query in HOT_QUERIES:
+		try:
+			rows = frappe.db.sql(f"EXPLAIN {query}", {"value": "_"}, as_dict=True)
+		except Exception as e:
+			# tables or columns of apps that aren't installed
+			print(f"  {title}: skipped ({e})")
+			continue
+
+		for row in rows:
+			plan = {
+				"query": title,
+				"type": row.get("type"),
+				"key": row.get("key"),
+				"rows": row.get("rows"),
+				"extra": row.get("Extra"),
+			}
+			plans.append(plan)
+			print(f"  {title}: type={plan['type']} key={plan['key']} rows={plan['rows']} extra={plan['extra']}")
+
+	return plans
@@ -0,0 +1,10 @@
+import frappe
+
+def execute():
+	# Columns matched by reset_password.reset; username already carries a unique index
+	for column in ("email", "phone"):
+		if not frappe.db.sql("""
+			SHOW INDEX FROM `tabUser`
+			WHERE Column_name = %s AND Seq_in_index = 1
+		""", column):
+			frappe.db.add_index("User", [column])
@@ -0,0 +1,130 @@
+import frappe
+from frappe.utils import cint, flt
+
+RATING_SUMMARY_KEY = "frappe_utils:rating_summary"
+# Drift from missed events can't outlive a day: the summary is rebuilt after expiry
+RATING_SUMMARY_TTL = 24 * 60 * 60
+STAR_FIELDS = [f"stars_{stars}" for stars in range(1, 6)]
+SUMMARY_FIELDS = ["count", "total", *STAR_FIELDS]
+
+# Applies one review to a cached summary atomically, and only if it is cached
+APPLY_REVIEW_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+	return 0
+end
+redis.call('HINCRBY', KEYS[1], 'count', ARGV[1])
+redis.call('HINCRBYFLOAT', KEYS[1], 'total', ARGV[2])
+redis.call('HINCRBY', KEYS[1], ARGV[3], ARGV[1])
+return 1
+"""
+
+
+def _get_summary_key(website_item):
+	return frappe.cache().make_key(f"{RATING_SUMMARY_KEY}:{website_item}")
+
+
+def get_rating_summary(website_item):
+	"""
+	Returns the cached rating summary of a Website Item:
+	{"count", "total", "histogram"}, where `total` is the sum of the raw 0-1 ratings
+	and `histogram` maps 1-5 stars to the number of reviews.
+	Kept as a Redis hash of counters, so the Item Review hooks update it with atomic
+	increments. Built with one grouped query on a miss and expired daily.
+	"""
+	cache = frappe.cache()
+	key = _get_summary_key(website_item)
+	values = cache.hmget(key, SUMMARY_FIELDS)
+	if values[0] is not None:
+		return {
+			"count": max(cint(values[0]), 0),
+			"total": max(flt(values[1]), 0.0),
+			"histogram": {stars: max(cint(value), 0) for stars, value in enumerate(values[2:], start=1)}
+		}
+
+	summary = _build_rating_summary(website_item)
+	mapping = {"count": summary["count"], "total": summary["total"]}
+	mapping.update({f"stars_{stars}": count for stars, count in summary["histogram"].items()})
+
+	pipeline = cache.pipeline()
+	pipeline.delete(key)
+	pipeline.hset(key, mapping=mapping)
+	pipeline.expire(key, RATING_SUMMARY_TTL)
+	pipeline.execute()
+	return summary
+
+
+def get_rating_info(website_item):
+	"""Rating summary in the 0-5 scale the frontend expects."""
+	summary = get_rating_summary(website_item) if website_item else _empty_summary()
+	count = summary["count"]
+
+	return {
+		"avg_rating": (summary["total"] / count * 5) if count else 0.0,
+		"review_count": count,
+		"rating_histogram": summary["histogram"]
+	}
+
+
+def _build_rating_summary(website_item):
+	summary = _empty_summary()
+	rows = frappe.db.sql("""
+		SELECT
+			ROUND(IFNULL(rating, 0) * 5) AS stars,
+			COUNT(*) AS count,
+			SUM(IFNULL(rating, 0)) AS total
+		FROM `tabItem Review`
+		WHERE website_item = %s
+		GROUP BY stars
+	""", website_item, as_dict=True)
+
+	for row in rows:
+		summary["count"] += cint(row.count)
+		summary["total"] += flt(row.total)
+		summary["histogram"][_get_stars(flt(row.stars) / 5)] += cint(row.count)
+
+	return summary
+
+
+def _empty_summary():
+	return {"count": 0, "total": 0.0, "histogram": {stars: 0 for stars in range(1, 6)}}
+
+
+def _get_stars(rating):
+	return min(max(cint(round(flt(rating) * 5)), 1), 5)
+
+
+def _apply_review(website_item, rating, sign):
+	"""Applies a single review to the cached summary instead of rebuilding it."""
+	frappe.cache().eval(
+		APPLY_REVIEW_SCRIPT, 1, _get_summary_key(website_item),
+		sign, sign * flt(rating), f"stars_{_get_stars(rating)}"
+	)
+
+
+def clear_rating_summary(website_item):
+	if website_item:
+		frappe.cache().delete_value(f"{RATING_SUMMARY_KEY}:{website_item}")
+
+
+def on_item_review_insert(doc, method=None):
+	# Applied after commit, so a rolled back insert never reaches the summary
+	if doc.website_item:
+		frappe.db.after_commit.add(lambda: _apply_review(doc.website_item, doc.rating, 1))
+
+
+def on_item_review_trash(doc, method=None):
+	if doc.website_item:
+		frappe.db.after_commit.add(lambda: _apply_review(doc.website_item, doc.rating, -1))
+
+
+def on_item_review_update(doc, method=None):
+	"""An edited rating or Website Item can't be applied as a delta; the summaries are rebuilt on next read."""
+	before = doc.get_doc_before_save()
+	if not before or (before.rating == doc.rating and before.website_item == doc.website_item):
+		return
+
+	def clear():
+		for website_item in {before.website_item, doc.website_item}:
+			clear_rating_summary(website_item)
+
+	frappe.db.after_commit.add(clear)
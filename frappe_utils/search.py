@@ -0,0 +1,184 @@
+import os
+import re
+import sqlite3
+from contextlib import closing
+
+import frappe
+from frappe.utils import cint, strip_html_tags
+from frappe_utils.catalog import get_catalog_items
+
+SEARCH_INDEX_FILE = "product_search.db"
+SEARCH_LIMIT = 20
+SUGGESTION_LIMIT = 8
+SUGGESTION_FIELDS = [
+	"name", "web_item_name", "item_code", "website_image", "website_image_variants", "route",
+	"formatted_price", "stock_status"
+]
+
+# Indexed columns in weight order for bm25; names are the Website Item fieldnames
+INDEXED_FIELDS = {
+	"web_item_name": 10.0,
+	"item_code": 8.0,
+	"item_group": 3.0,
+	"custom_section": 2.0,
+	"custom_item_season": 2.0,
+	"short_description": 1.0,
+}
+
+
+def get_index_path():
+	# kept outside private/files so it is never served as a file attachment
+	folder = frappe.get_site_path("private", "search")
+	os.makedirs(folder, exist_ok=True)
+	return os.path.join(folder, SEARCH_INDEX_FILE)
+
+
+def _connect(path=None):
+	conn = sqlite3.connect(path or get_index_path(), timeout=10)
+	conn.row_factory = sqlite3.Row
+	return conn
+
+
+def _create_schema(conn):
+	columns = ", ".join(INDEXED_FIELDS)
+	conn.execute(f"""
+		CREATE VIRTUAL TABLE IF NOT EXISTS website_item USING fts5(
+			name UNINDEXED, {columns}, published UNINDEXED, ranking UNINDEXED,
+			tokenize = 'unicode61 remove_diacritics 2',
+			prefix = '1 2 3'
+		)
+	""")
+
+
+def _get_index_fields():
+	meta = frappe.get_meta("Website Item")
+	fields = ["name", "published", "ranking"]
+	# the custom fields come from fixtures and may not be installed yet
+	return fields + [field for field in INDEXED_FIELDS if meta.has_field(field)]
+
+
+def _get_rows(filters=None):
+	rows = []
+	for item in frappe.get_all("Website Item", filters=filters, fields=_get_index_fields()):
+		item["short_description"] = strip_html_tags(item.get("short_description") or "")
+		rows.append(
+			[item.name]
+			+ [item.get(field) or "" for field in INDEXED_FIELDS]
+			+ [cint(item.published), cint(item.ranking)]
+		)
+	return rows
+
+
+def _insert_rows(conn, rows):
+	placeholders = ", ".join(["?"] * (len(INDEXED_FIELDS) + 3))
+	conn.executemany(f"INSERT INTO website_item VALUES ({placeholders})", rows)
+
+
+def rebuild_search_index():
+	"""
+	Rebuilds the product search index from scratch. The new index is written next to
+	the live one and swapped in atomically, so searches keep working meanwhile.
+	"""
+	path = get_index_path()
+	tmp_path = f"{path}.{os.getpid()}.tmp"
+	if os.path.exists(tmp_path):
+		os.remove(tmp_path)
+
+	with closing(_connect(tmp_path)) as conn:
+		_create_schema(conn)
+		_insert_rows(conn, _get_rows())
+		conn.execute("INSERT INTO website_item(website_item) VALUES ('optimize')")
+		conn.commit()
+
+	os.replace(tmp_path, path)
+
+
+def _ensure_search_index():
+	if not os.path.exists(get_index_path()):
+		rebuild_search_index()
+
+
+def index_website_items(names):
+	"""Re-indexes the given Website Items, dropping the ones that no longer exist."""
+	names = list(set(names or []))
+	if not names:
+		return
+
+	_ensure_search_index()
+	rows = _get_rows({"name": ["in", names]})
+	with closing(_connect()) as conn:
+		conn.executemany("DELETE FROM website_item WHERE name = ?", [(name,) for name in names])
+		_insert_rows(conn, rows)
+		conn.commit()
+
+
+def on_website_item_change(doc, method=None):
+	"""Website Item doc event: keeps the search index in sync with a single row update."""
+	try:
+		index_website_items([doc.name])
+	except sqlite3.Error:
+		# the index is a cache; the scheduled rebuild recovers it
+		frappe.log_error(title="Product search index update failed")
+
+
+def _build_match_query(text, prefix_last=True):
+	"""
+	FTS5 MATCH expression for free text: every token must match, the last one as a
+	prefix so partially typed words still find results. Tokens are quoted, so user
+	input can never be parsed as FTS syntax.
+	"""
+	tokens = re.findall(r"\w+", text or "", flags=re.UNICODE)
+	if not tokens:
+		return None
+
+	terms = [f'"{token}"' for token in tokens]
+	if prefix_last:
+		terms[-1] += "*"
+	return " ".join(terms)
+
+
+def _search_item_codes(match, limit, start=0):
+	_ensure_search_index()
+	weights = ", ".join(str(weight) for weight in INDEXED_FIELDS.values())
+	with closing(_connect()) as conn:
+		rows = conn.execute(f"""
+			SELECT item_code
+			FROM website_item
+			WHERE website_item MATCH ? AND published = 1
+			ORDER BY bm25(website_item, 0.0, {weights}), ranking DESC
+			LIMIT ? OFFSET ?
+		""", (match, limit, start)).fetchall()
+
+	return [row["item_code"] for row in rows]
+
+
+@frappe.whitelist(allow_guest=True)
+def search_products(query, limit=SEARCH_LIMIT, start=0):
+	"""
+	Ranked product search over the local index. Returns published Website Items with
+	price and stock status, best match first.
+	"""
+	limit = min(cint(limit) or SEARCH_LIMIT, 100)
+	start = max(cint(start), 0)
+
+	match = _build_match_query(query)
+	if not match:
+		return {"items": [], "next_start": None}
+
+	item_codes = _search_item_codes(match, limit, start)
+	return {
+		"items": get_catalog_items(item_codes),
+		"next_start": start + len(item_codes) if len(item_codes) == limit else None
+	}
+
+
+@frappe.whitelist(allow_guest=True)
+def search_suggestions(prefix, limit=SUGGESTION_LIMIT):
+	"""Typeahead: a short list of products matching a partially typed query."""
+	limit = min(cint(limit) or SUGGESTION_LIMIT, 20)
+
+	match = _build_match_query(prefix)
+	if not match:
+		return []
+
+	return get_catalog_items(_search_item_codes(match, limit), fields=SUGGESTION_FIELDS)
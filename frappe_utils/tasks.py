@@ -18,6 +18,7 @@ def daily_unpublish_job():
 		fields=["name", "item_code", "published", "website_warehouse"]
 	)
 
+	changed = []
 	for item in items:
 		stock_data = get_web_item_qty_in_stock(item.item_code, "website_warehouse", item.website_warehouse)
 		stock_qty = stock_data.get("stock_qty", 0.0)
@@ -28,7 +29,16 @@ def daily_unpublish_job():
 			if item.published:
 				frappe.db.set_value("Website Item", item.name, "published", 0)
 				frappe.db.commit()
+				changed.append(item.name)
 		else:
 			if not item.published:
 				frappe.db.set_value("Website Item", item.name, "published", 1)
 				frappe.db.commit()
+				changed.append(item.name)
+
+	# set_value skips doc events, so the category counts and search index are refreshed here
+	if changed:
+		from frappe_utils.search import index_website_items
+		from frappe_utils.website_customization.api.home import clear_shop_by_category_cache
+		clear_shop_by_category_cache()
+		index_website_items(changed)
@@ -1,5 +1,7 @@
 
+import hashlib
 import frappe
+from frappe_utils.instrumentation import record_cache_lookup
 
 def should_be_published(item_code, stock_qty=0, is_discontinued=0):
 	"""
@@ -21,16 +23,185 @@ def should_be_published(item_code, stock_qty=0, is_discontinued=0):
 
 	return False
 
+ACTIVE_WORK_ORDER_ITEMS_KEY = "frappe_utils:active_work_order_items"
+ACTIVE_WORK_ORDER_BUILT_KEY = "frappe_utils:active_work_order_items:built"
+ACTIVE_WORK_ORDER_FILTERS = {
+	"status": ["not in", ["Completed", "Cancelled"]],
+	"docstatus": ["in", [1, 0]],
+}
+
 def has_active_work_order(item_code):
 	"""
 	Checks if there is an active Work Order for the item.
 	Active = Not Completed and Not Cancelled.
+	Answered by an O(1) membership check on the Redis set of such items.
+	"""
+	_ensure_active_work_order_items()
+	return bool(frappe.cache().sismember(ACTIVE_WORK_ORDER_ITEMS_KEY, item_code))
+
+def get_active_work_order_items(item_codes):
+	"""
+	Returns the subset of `item_codes` that have an active Work Order,
+	from the Redis set of such items. Only the requested codes are checked,
+	with pipelined SISMEMBER calls in a single round trip.
 	"""
-	return frappe.db.exists(
+	item_codes = list(dict.fromkeys(item_codes or []))
+	if not item_codes:
+		return set()
+
+	_ensure_active_work_order_items()
+	cache = frappe.cache()
+	key = cache.make_key(ACTIVE_WORK_ORDER_ITEMS_KEY)
+	pipeline = cache.pipeline(transaction=False)
+	for item_code in item_codes:
+		pipeline.sismember(key, item_code)
+
+	return {item_code for item_code, is_member in zip(item_codes, pipeline.execute()) if is_member}
+
+def _ensure_active_work_order_items():
+	# An empty Redis set doesn't exist, so a separate key records that it was built
+	if not frappe.cache().get_value(ACTIVE_WORK_ORDER_BUILT_KEY):
+		rebuild_active_work_order_items()
+
+def rebuild_active_work_order_items():
+	"""
+	Rebuilds the set of items with an active Work Order from the database.
+	Runs on first use and periodically from the scheduler as a safety net.
+	"""
+	items = frappe.db.get_all(
 		"Work Order",
-		{
-			"production_item": item_code,
-			"status": ["not in", ["Completed", "Cancelled"]], 
-			"docstatus": ["in", [1, 0]],
-		}
+		filters=ACTIVE_WORK_ORDER_FILTERS,
+		pluck="production_item",
+		distinct=True
 	)
+
+	cache = frappe.cache()
+	key = cache.make_key(ACTIVE_WORK_ORDER_ITEMS_KEY)
+	pipeline = cache.pipeline()
+	pipeline.delete(key)
+	if items:
+		pipeline.sadd(key, *items)
+	pipeline.execute()
+	cache.set_value(ACTIVE_WORK_ORDER_BUILT_KEY, 1, expires_in_sec=2 * 60 * 60)
+
+def refresh_active_work_order_item(item_code):
+	"""Re-evaluates one item against the database and updates its set membership."""
+	if not item_code:
+		return
+
+	if frappe.db.exists("Work Order", {"production_item": item_code, **ACTIVE_WORK_ORDER_FILTERS}):
+		frappe.cache().sadd(ACTIVE_WORK_ORDER_ITEMS_KEY, item_code)
+	else:
+		frappe.cache().srem(ACTIVE_WORK_ORDER_ITEMS_KEY, item_code)
+
+def on_work_order_change(doc, method=None):
+	"""
+	Work Order doc event. `on_change` also fires for the status updates
+	Work Order makes through db_set, e.g. when production completes.
+	The set is refreshed after commit, so a rolled back save leaves it untouched.
+	"""
+	item_codes = {doc.production_item}
+
+	before = doc.get_doc_before_save() if method != "after_delete" else None
+	if before and before.production_item != doc.production_item:
+		item_codes.add(before.production_item)
+
+	def refresh():
+		for item_code in item_codes:
+			refresh_active_work_order_item(item_code)
+
+	frappe.db.after_commit.add(refresh)
+
+def get_stock_status(is_stock_item, stock_qty, has_active_wo):
+	"""
+	Storefront stock label:
+	- Non stock items and items with stock -> In Stock
+	- No stock but an active Work Order -> In Process
+	- Otherwise -> Out of Stock
+	"""
+	if not is_stock_item or stock_qty > 0:
+		return "In Stock"
+
+	if has_active_wo:
+		return "In Process"
+
+	return "Out of Stock"
+
+def get_cached(key, generator, field=None, expires_in_sec=None):
+	"""
+	Returns the value cached in Redis under `key` (or under the hash `field` of `key`),
+	building and storing it with `generator` on a miss.
+	A hash gets its expiry when it is created and keeps it, so no field outlives it.
+	"""
+	cache = frappe.cache()
+	value = cache.hget(key, field) if field else cache.get_value(key)
+	record_cache_lookup(value is not None)
+
+	if value is None:
+		value = generator()
+		if field:
+			cache.hset(key, field, value)
+			if expires_in_sec and cache.ttl(cache.make_key(key)) < 0:
+				cache.expire(cache.make_key(key), expires_in_sec)
+		else:
+			cache.set_value(key, value, expires_in_sec=expires_in_sec)
+
+	return value
+
+
+def make_etag(*parts):
+	"""Builds a short, stable version token out of the given parts."""
+	return hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()[:20]
+
+
+def get_doctype_version(doctypes, *extra):
+	"""
+	Version token for data derived from `doctypes`: the latest `modified` of each one
+	plus their latest deletion, read in a single query served by the `modified` indexes.
+	`extra` parts (settings versions, user, request arguments) are folded into the token.
+	"""
+	queries = [f"SELECT MAX(modified) FROM `tab{doctype}`" for doctype in doctypes]
+	queries.append("SELECT MAX(creation) FROM `tabDeleted Document` WHERE deleted_doctype IN %(doctypes)s")
+	rows = frappe.db.sql(" UNION ALL ".join(queries), {"doctypes": tuple(doctypes)})
+
+	return make_etag(*[row[0] for row in rows], *extra)
+
+
+def respond_with_etag(etag, generator):
+	"""
+	Serves `generator()` tagged with `etag`.
+	When the client already holds this version (If-None-Match), the body is skipped
+	and a 304 is returned instead.
+	"""
+	etag = f'"{etag}"'
+	set_response_header("ETag", etag)
+
+	request = getattr(frappe.local, "request", None)
+	if request and etag in (request.headers.get("If-None-Match") or "").replace("W/", "").split(", "):
+		frappe.local.response["http_status_code"] = 304
+		return None
+
+	return generator()
+
+
+def set_response_header(key, value):
+	"""
+	Sets a header on the current response. Frappe versions without
+	`frappe.local.response_headers` get it from the `apply_response_headers` after_request hook.
+	"""
+	response_headers = getattr(frappe.local, "response_headers", None)
+	if response_headers is not None:
+		response_headers[key] = value
+
+	if getattr(frappe.local, "frappe_utils_response_headers", None) is None:
+		frappe.local.frappe_utils_response_headers = {}
+	frappe.local.frappe_utils_response_headers[key] = value
+
+
+def apply_response_headers(response=None, request=None):
+	"""after_request hook: copies the headers set through `set_response_header` onto the response."""
+	headers = getattr(frappe.local, "frappe_utils_response_headers", None)
+	frappe.local.frappe_utils_response_headers = None
+	if headers and response is not None:
+		for key, value in headers.items():
+			response.headers[key] = value
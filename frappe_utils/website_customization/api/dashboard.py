@@ -1,43 +1,89 @@
+import json
 import frappe
-from frappe.utils import flt
+from frappe import _
+from frappe.utils import cint, flt, nowdate
+from frappe_utils.website_customization.doctype.customer_financial_summary.customer_financial_summary import get_financial_summary
+
+AGING_BUCKETS = ("0-30", "31-60", "61-90", "90+")
+
 
 @frappe.whitelist()
-def get_financial_info(customer: str):
+def get_financial_info(customer: str, include_aging=0):
     """
     Returns per-company credit limit, outstanding and balance
-    for the given customer, aggregated efficiently.
+    for the given customer, read from Customer Financial Summary.
+    With `include_aging`, each company also gets aging buckets and the
+    overdue amount, computed live in a single grouped pass.
     """
 
     if not customer:
         raise ValueError("Customer is required")
 
-    # 1) Get credit limits per company
-    credit_limits = frappe.db.sql("""
-        SELECT
-            company,
-            SUM(credit_limit) AS credit_limit
-        FROM `tabCustomer Credit Limit`
-        WHERE parent = %s
-        GROUP BY company
-    """, customer, as_dict=1)
+    # 1) Read credit limits and outstanding per company from the
+    #    incrementally maintained summary table, O(companies)
+    summary = get_financial_summary(customer)
+
+    cl_map = {d.company: flt(d.credit_limit) for d in summary}
+    out_map = {d.company: flt(d.outstanding) for d in summary}
+
+    if not cint(include_aging):
+        # 2) Build result list
+        return _build_financial_info(customer, cl_map, out_map)
+
+    # 2) Outstanding, aging and overdue in one pass; the live outstanding
+    #    from this pass takes precedence over the summary table
+    aging = _get_aging(customer)
+    out_map.update({company: d.outstanding for company, d in aging.items()})
+
+    # 3) Build result list
+    info = _build_financial_info(customer, cl_map, out_map)
+
+    totals = {"aging": dict.fromkeys(AGING_BUCKETS, 0.0), "overdue": 0.0}
+    for row in info["company_wise"]:
+        company_aging = aging.get(row["company"]) or frappe._dict()
+        row["aging"] = {bucket: flt(company_aging.get(bucket)) for bucket in AGING_BUCKETS}
+        row["overdue"] = flt(company_aging.get("overdue"))
 
-    cl_map = {d.company: flt(d.credit_limit) for d in credit_limits}
+        for bucket in AGING_BUCKETS:
+            totals["aging"][bucket] += row["aging"][bucket]
+        totals["overdue"] += row["overdue"]
 
-    # 2) Get outstanding amounts per company
-    outstanding = frappe.db.sql("""
+    info["totals"].update(totals)
+    return info
+
+
+def _get_aging(customer):
+    """
+    Outstanding per company split into aging buckets by days past the due date
+    (invoices not yet due fall in 0-30), plus the overdue amount, using conditional
+    aggregation. Served by the customer_docstatus_aging_index covering index.
+    """
+    aging = frappe.db.sql("""
         SELECT
             si.company,
-            SUM(IFNULL(si.outstanding_amount, 0)) AS outstanding
+            SUM(si.outstanding_amount) AS outstanding,
+            SUM(CASE WHEN DATEDIFF(%(today)s, IFNULL(si.due_date, si.posting_date)) <= 30
+                THEN si.outstanding_amount ELSE 0 END) AS `0-30`,
+            SUM(CASE WHEN DATEDIFF(%(today)s, IFNULL(si.due_date, si.posting_date)) BETWEEN 31 AND 60
+                THEN si.outstanding_amount ELSE 0 END) AS `31-60`,
+            SUM(CASE WHEN DATEDIFF(%(today)s, IFNULL(si.due_date, si.posting_date)) BETWEEN 61 AND 90
+                THEN si.outstanding_amount ELSE 0 END) AS `61-90`,
+            SUM(CASE WHEN DATEDIFF(%(today)s, IFNULL(si.due_date, si.posting_date)) > 90
+                THEN si.outstanding_amount ELSE 0 END) AS `90+`,
+            SUM(CASE WHEN IFNULL(si.due_date, si.posting_date) < %(today)s
+                THEN si.outstanding_amount ELSE 0 END) AS overdue
         FROM `tabSales Invoice` si
         WHERE
-            si.customer = %s
+            si.customer = %(customer)s
             AND si.docstatus = 1
+            AND si.outstanding_amount != 0
         GROUP BY si.company
-    """, customer, as_dict=1)
+    """, {"customer": customer, "today": nowdate()}, as_dict=1)
 
-    out_map = {d.company: flt(d.outstanding) for d in outstanding}
+    return {d.company: d for d in aging}
 
-    # 3) Build result list
+
+def _build_financial_info(customer, cl_map, out_map):
     results = []
     total_credit = total_outstanding = total_balance = 0
 
@@ -69,3 +115,91 @@ def get_financial_info(customer: str):
             "balance": total_balance
         }
     }
+
+
+@frappe.whitelist()
+def get_financial_overview(customers=None, customer_group=None, territory=None, stream=0):
+    """
+    Per-customer, per-company credit limit, outstanding and balance for many
+    customers at once, using two grouped queries in total.
+    Customers are selected by an explicit list, a Customer Group or a Territory
+    (child groups/territories included). With `stream` set, the result is sent
+    as JSON lines, one customer per line.
+    """
+    frappe.has_permission("Sales Invoice", "read", throw=True)
+
+    condition, values = _get_customer_condition(customers, customer_group, territory)
+
+    # 1) Credit limits per customer and company
+    credit_limits = frappe.db.sql(f"""
+        SELECT
+            parent AS customer,
+            company,
+            SUM(credit_limit) AS credit_limit
+        FROM `tabCustomer Credit Limit`
+        WHERE parenttype = 'Customer' AND parent {condition}
+        GROUP BY parent, company
+    """, values, as_dict=1)
+
+    # 2) Outstanding per customer and company
+    outstanding = frappe.db.sql(f"""
+        SELECT
+            si.customer,
+            si.company,
+            SUM(IFNULL(si.outstanding_amount, 0)) AS outstanding
+        FROM `tabSales Invoice` si
+        WHERE si.docstatus = 1 AND si.customer {condition}
+        GROUP BY si.customer, si.company
+    """, values, as_dict=1)
+
+    cl_maps, out_maps = {}, {}
+    for d in credit_limits:
+        cl_maps.setdefault(d.customer, {})[d.company] = flt(d.credit_limit)
+    for d in outstanding:
+        out_maps.setdefault(d.customer, {})[d.company] = flt(d.outstanding)
+
+    rows = (
+        _build_financial_info(customer, cl_maps.get(customer, {}), out_maps.get(customer, {}))
+        for customer in sorted(set(cl_maps) | set(out_maps))
+    )
+
+    if cint(stream):
+        from werkzeug.wrappers import Response
+        return Response(
+            (json.dumps(row, default=str) + "\n" for row in rows),
+            mimetype="application/x-ndjson"
+        )
+
+    return list(rows)
+
+
+def _get_customer_condition(customers=None, customer_group=None, territory=None):
+    """SQL condition (to follow a customer column) selecting the requested customers."""
+    # parsed before the check: "[]" is truthy but would become IN (), a SQL syntax error
+    if isinstance(customers, str):
+        customers = frappe.parse_json(customers) if customers.strip() else None
+
+    if customers:
+        if not isinstance(customers, (list, tuple)):
+            frappe.throw(_("Customers must be a list"))
+        return "IN %(customers)s", {"customers": tuple(customers)}
+
+    for doctype, value, fieldname in (
+        ("Customer Group", customer_group, "customer_group"),
+        ("Territory", territory, "territory"),
+    ):
+        if not value:
+            continue
+
+        lft, rgt = frappe.db.get_value(doctype, value, ["lft", "rgt"]) or (None, None)
+        if lft is None:
+            frappe.throw(_("{0} {1} not found").format(doctype, value))
+
+        return f"""IN (
+            SELECT c.name
+            FROM `tabCustomer` c
+            INNER JOIN `tab{doctype}` grp ON grp.name = c.{fieldname}
+            WHERE grp.lft >= %(lft)s AND grp.rgt <= %(rgt)s
+        )""", {"lft": lft, "rgt": rgt}
+
+    frappe.throw(_("Pass customers, a customer group or a territory"))
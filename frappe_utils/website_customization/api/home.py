@@ -1,18 +1,17 @@
 import frappe 
 import json
 from frappe_utils.api import get_products_with_stock
+from frappe_utils.utils import get_cached, get_doctype_version, respond_with_etag
+from frappe_utils.website_customization.doctype.website_customization_settings.website_customization_settings import get_settings
+
+SHOP_BY_CATEGORY_TTL = 7 * 24 * 60 * 60
 
 def get_sections():
-	sections = frappe.db.sql(
-		"""
-		SELECT section_name, `order`
-		FROM `tabHome Page Section`
-		WHERE is_active = 1
-		ORDER BY `order` ASC
-		""",
-		as_dict=True
-	)
-	return sections
+	return [
+		{"section_name": row.section_name, "order": row.order}
+		for row in get_settings().section_setting
+		if row.is_active
+	]
 
 @frappe.whitelist(allow_guest=True)
 def get_products_by_section():
@@ -38,28 +37,111 @@ def get_products_by_section():
 	for items in result.values():
 		items.sort(key=lambda x: x.get("custom_section_order") or 0)
 
-	community_link = frappe.get_doc("Website Customization Settings").community_link
+	community_link = get_settings().community_link
 
 	return result,{"whatsapp_community_link":community_link}
 
 
-@frappe.whitelist(allow_guest=True)
-def get_shop_by_category():
-	
-	filter_field = frappe.get_doc("Website Customization Settings").website_item_field
-	
+def _get_shop_by_category_key(settings):
+	# Keyed by the settings version, so saving the settings invalidates it
+	return f"frappe_utils:shop_by_category:{settings.modified}"
+
+
+def _get_category_field(settings):
+	if not settings.website_item_field:
+		return None
+
+	fieldname = settings.website_item_field.split(" ")[0]
+	if not frappe.get_meta("Website Item").has_field(fieldname):
+		return None
+
+	return fieldname
+
+
+def _count_visible_items(fieldname, values):
+	"""Published Website Items per category value, in one grouped query."""
+	values = [value for value in values if value]
+	if not values:
+		return {}
+
+	counts = frappe.db.sql(f"""
+		SELECT `{fieldname}` AS value, COUNT(*) AS item_count
+		FROM `tabWebsite Item`
+		WHERE published = 1 AND `{fieldname}` IN %(values)s
+		GROUP BY `{fieldname}`
+	""", {"values": tuple(values)}, as_dict=True)
+
+	return {d.value: d.item_count for d in counts}
+
+
+def _build_shop_by_category(settings):
+	filter_field = _get_category_field(settings)
 	if not filter_field:
 		return {}
 
-	filter_filed = filter_field.split(" ")[0]
-	
-	query = """
-	SELECT display_name,value,thumbnail 
-	FROM `tabShop By Category` 
-	WHERE 
-	parent = 'Website Customization Settings'
-	ORDER BY `order` ASC
+	counts = _count_visible_items(filter_field, [row.value for row in settings.category])
+	data = [
+		{
+			"display_name": row.display_name,
+			"value": row.value,
+			"thumbnail": row.thumbnail,
+			"item_count": counts.get(row.value, 0)
+		}
+		for row in settings.category
+	]
+	return {"shop_by_category": data, "filter_field": filter_field}
+
+
+@frappe.whitelist(allow_guest=True)
+def get_shop_by_category():
+	"""
+	Shop By Category tiles with the number of visible Website Items behind each one.
+	Served from a precomputed payload that Website Item changes keep up to date, and
+	tagged with an ETag so clients revalidating with If-None-Match get a 304.
 	"""
-	data = frappe.db.sql(query, as_dict=True)
-	return {"shop_by_category": data,"filter_field":filter_filed}
+	settings = get_settings()
+	version = get_doctype_version(["Website Item"], settings.modified)
+	return respond_with_etag(version, lambda: get_cached(
+		_get_shop_by_category_key(settings),
+		lambda: _build_shop_by_category(settings),
+		expires_in_sec=SHOP_BY_CATEGORY_TTL
+	))
+
+
+def clear_shop_by_category_cache():
+	frappe.cache().delete_value(_get_shop_by_category_key(get_settings()))
+
+
+def on_website_item_change(doc, method=None):
+	"""
+	Website Item doc event: recounts only the categories the item moved out of or into,
+	and patches them in the cached payload.
+	"""
+	settings = get_settings()
+	filter_field = _get_category_field(settings)
+	if not filter_field:
+		return
+
+	key = _get_shop_by_category_key(settings)
+	payload = frappe.cache().get_value(key)
+	if not payload:
+		return
+
+	affected = {doc.get(filter_field)}
+	before = doc.get_doc_before_save() if method != "after_delete" else None
+	if before:
+		if before.get(filter_field) == doc.get(filter_field) and before.published == doc.published:
+			return
+		affected.add(before.get(filter_field))
+
+	affected &= {tile["value"] for tile in payload["shop_by_category"]}
+	if not affected:
+		return
+
+	counts = _count_visible_items(filter_field, affected)
+	for tile in payload["shop_by_category"]:
+		if tile["value"] in affected:
+			tile["item_count"] = counts.get(tile["value"], 0)
+
+	frappe.cache().set_value(key, payload, expires_in_sec=SHOP_BY_CATEGORY_TTL)
 
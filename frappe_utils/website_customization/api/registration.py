@@ -1,5 +1,12 @@
 import frappe
 from frappe import _
+from frappe.utils import cint
+from frappe.utils.csvutils import read_csv_content
+from frappe_utils.utils import get_cached
+
+# Roles every portal user gets, assigned in the same save that creates the User
+PORTAL_ROLES = ("Customer", "Accounts User")
+
 
 @frappe.whitelist(allow_guest=True)
 def register(businessName, contactName, email, phone, password, gst=None, acceptTerms=None):
@@ -11,67 +18,8 @@ def register(businessName, contactName, email, phone, password, gst=None, accept
 		return {"status": "error", "message": _("User with this email already exists")}
 
 	try:
-		# 1. Create User
-		user = frappe.new_doc("User")
-		user.email = email
-		
-		# Split Contact Name
-		if contactName:
-			if " " in contactName:
-				parts = contactName.strip().split(" ", 1)
-				user.first_name = parts[0]
-				user.last_name = parts[1] if len(parts) > 1 else ""
-			else:
-				user.first_name = contactName.strip()
-				user.last_name = ""
-		
-		user.enabled = 1
-		user.new_password = password
-		user.mobile_no = phone
-		user.user_type = "Website User"
-		
-		user.save(ignore_permissions=True)
-		
-		# Add Customer Role
-		if frappe.db.exists("Role", "Customer"):
-			user.add_roles("Customer")
-
-		if frappe.db.exists("Role", "Accounts User"):
-			user.add_roles("Accounts User")
-
-		# 2. Link to Customer
-		customer_name = frappe.db.get_value("Customer", {"email_id": email}, "name")
-		
-		if customer_name:
-			customer = frappe.get_doc("Customer", customer_name)
-		else:
-			customer = frappe.new_doc("Customer")
-			customer.customer_name = businessName
-			customer.customer_type = "Company"
-			customer.tax_id = gst
-			customer.email_id = email
-			customer.mobile_no = phone
-			
-			customer.customer_group = frappe.db.get_single_value("Selling Settings", "customer_group") or "All Customer Groups"
-				
-			if not customer.territory:
-				customer.territory = frappe.db.get_single_value("Selling Settings", "territory") or "All Territories"
-			
-			customer.save(ignore_permissions=True)
-		
-		# Link User in Portal Users
-		user_linked = False
-		for pu in customer.portal_users:
-			if pu.user == user.name:
-				user_linked = True
-				break
-		
-		if not user_linked:
-			customer.append("portal_users", {
-				"user": user.name
-			})
-			customer.save(ignore_permissions=True)
-
+		user, customer = _register(businessName, contactName, email, phone, password, gst)
+		queue_welcome_mails([user.name])
 		frappe.db.commit()
 		
 		return {
@@ -85,3 +33,166 @@ def register(businessName, contactName, email, phone, password, gst=None, accept
 		frappe.log_error(f"Registration Error: {str(e)}")
 		return {"status": "error", "message": _("Registration failed. Please try again or contact support.")}
 
+
+def _register(business_name, contact_name, email, phone, password=None, gst=None, customer_defaults=None):
+	"""
+	Creates the User (roles included) and links it to a new or existing Customer,
+	with a single save per document. The caller queues the welcome email once the
+	registration is committed, see queue_welcome_mails.
+	"""
+	user = _create_user(email, contact_name, phone, password)
+	customer = _link_customer(user.name, business_name, email, phone, gst, customer_defaults)
+	return user, customer
+
+
+def _create_user(email, contact_name, phone, password=None):
+	user = frappe.new_doc("User")
+	user.email = email
+	
+	# Split Contact Name
+	if full_name := (contact_name or "").strip():
+		parts = full_name.split(" ", 1)
+		user.first_name = parts[0]
+		user.last_name = parts[1] if len(parts) > 1 else ""
+	
+	user.enabled = 1
+	user.mobile_no = phone
+	user.user_type = "Website User"
+	if password:
+		user.new_password = password
+
+	# Roles go in with the insert instead of one save per add_roles call
+	for role in _get_portal_roles():
+		user.append("roles", {"role": role})
+
+	user.flags.no_welcome_mail = True
+	user.insert(ignore_permissions=True)
+	return user
+
+
+def _link_customer(user, business_name, email, phone, gst=None, customer_defaults=None):
+	customer_name = frappe.db.get_value("Customer", {"email_id": email}, "name")
+	
+	if customer_name:
+		customer = frappe.get_doc("Customer", customer_name)
+		if any(pu.user == user for pu in customer.portal_users):
+			return customer
+
+		customer.append("portal_users", {"user": user})
+		customer.save(ignore_permissions=True)
+		return customer
+
+	defaults = customer_defaults or _get_customer_defaults()
+
+	customer = frappe.new_doc("Customer")
+	customer.customer_name = business_name
+	customer.customer_type = "Company"
+	customer.tax_id = gst
+	customer.email_id = email
+	customer.mobile_no = phone
+	customer.customer_group = defaults.customer_group or "All Customer Groups"
+	customer.territory = defaults.territory or "All Territories"
+	customer.append("portal_users", {"user": user})
+
+	customer.insert(ignore_permissions=True)
+	return customer
+
+
+def _get_portal_roles():
+	return get_cached(
+		"frappe_utils:portal_roles",
+		lambda: frappe.get_all("Role", filters={"name": ["in", PORTAL_ROLES]}, pluck="name"),
+		expires_in_sec=60 * 60
+	)
+
+
+def _get_customer_defaults():
+	return frappe.db.get_value(
+		"Selling Settings", "Selling Settings", ["customer_group", "territory"], as_dict=True
+	) or frappe._dict()
+
+
+def queue_welcome_mails(users):
+	"""Queues the welcome email of the given users for after the next commit."""
+	if not users:
+		return
+
+	frappe.enqueue(
+		"frappe_utils.website_customization.api.registration.send_welcome_mail",
+		users=list(users),
+		enqueue_after_commit=True
+	)
+
+
+def send_welcome_mail(users):
+	"""Background job: sends the welcome email the way User.after_insert would."""
+	for name in users:
+		if not frappe.db.exists("User", name):
+			continue
+
+		user = frappe.get_doc("User", name)
+		if cint(user.send_welcome_email):
+			user.send_welcome_mail_to_user()
+
+
+@frappe.whitelist()
+def bulk_register(file_url):
+	"""
+	Queues onboarding of many B2B customers from an uploaded CSV file.
+	Expected columns: businessName, contactName, email, phone, gst.
+	Users are created without a password and set it from the welcome email.
+	"""
+	frappe.only_for("System Manager")
+
+	frappe.enqueue(
+		"frappe_utils.website_customization.api.registration.import_registrations",
+		file_url=file_url,
+		queue="long",
+		timeout=3600,
+		job_name=f"Bulk registration from {file_url}"
+	)
+	return {"status": "queued", "message": _("Bulk registration has been queued")}
+
+
+def import_registrations(file_url, batch_size=100):
+	"""Registers every row of the CSV, committing once per batch."""
+	rows = read_csv_content(frappe.get_doc("File", {"file_url": file_url}).get_content())
+	if not rows:
+		return {"created": 0, "skipped": 0, "failed": []}
+
+	header = [column.strip() for column in rows[0]]
+	customer_defaults = _get_customer_defaults()
+	created, skipped, failed = 0, 0, []
+	# Mails of the current batch, queued only with the commit that keeps their users
+	pending_mails = []
+
+	for row_no, row in enumerate(rows[1:], start=2):
+		data = frappe._dict(zip(header, row))
+		email = (data.email or "").strip()
+
+		if not email or frappe.db.exists("User", email):
+			skipped += 1
+			continue
+
+		frappe.db.savepoint("bulk_registration")
+		try:
+			user, _customer = _register(data.businessName, data.contactName, email, data.phone,
+				gst=data.gst or None, customer_defaults=customer_defaults)
+			pending_mails.append(user.name)
+			created += 1
+		except Exception as e:
+			frappe.db.rollback(save_point="bulk_registration")
+			failed.append({"row": row_no, "email": email, "error": str(e)})
+
+		if (created + len(failed)) % batch_size == 0:
+			queue_welcome_mails(pending_mails)
+			frappe.db.commit()
+			pending_mails = []
+
+	queue_welcome_mails(pending_mails)
+	frappe.db.commit()
+
+	if failed:
+		frappe.log_error(title="Bulk Registration", message=frappe.as_json(failed))
+
+	return {"created": created, "skipped": skipped, "failed": failed}
@@ -1,35 +1,87 @@
 import frappe
+from frappe import _
+from frappe.rate_limiter import rate_limit
 from frappe.utils import validate_email_address
-from frappe.core.doctype.user.user import reset_password
+from frappe.core.doctype.user.user import get_password_reset_limit, reset_password
+
+IDENTIFIER_COLUMNS = ("email", "username", "phone")
+IDENTIFIER_CACHE_TTL = 10 * 60
+
+
+def _get_identifier_key(identifier):
+    return f"frappe_utils:reset_identifier:{identifier}"
+
+
+def find_user(identifier):
+    """
+    Resolves a normalized identifier to an enabled User name.
+    Every column is matched with a plain equality so its index is used
+    (the table collation is already case-insensitive), trying the most
+    likely column first. Hits are cached for a few minutes; misses are not,
+    so a user who registers right after a failed attempt is found at once
+    (floods of unknown identifiers are held back by the rate limit on `reset`).
+    """
+    key = _get_identifier_key(identifier)
+    if name := frappe.cache().get_value(key):
+        return name
+
+    if "@" in identifier:
+        columns = ("email", "username", "phone")
+    elif identifier.lstrip("+").replace(" ", "").isdigit():
+        columns = ("phone", "username", "email")
+    else:
+        columns = ("username", "email", "phone")
+
+    for column in columns:
+        name = frappe.db.get_value("User", {column: identifier, "enabled": 1}, "name")
+        if name:
+            frappe.cache().set_value(key, name, expires_in_sec=IDENTIFIER_CACHE_TTL)
+            return name
+
+    return None
+
+
+def _get_user(user_name, identifier):
+    """The enabled user, only if it still owns `identifier`."""
+    user = user_name and frappe.db.get_value(
+        "User", {"name": user_name, "enabled": 1}, ["name", "email", "username", "phone"], as_dict=1
+    )
+    if user and any((user.get(column) or "").strip().lower() == identifier for column in IDENTIFIER_COLUMNS):
+        return user
+    return None
+
+
+def clear_identifier_cache(*identifiers):
+    for identifier in identifiers:
+        if identifier:
+            frappe.cache().delete_value(_get_identifier_key(identifier.strip().lower()))
+
+
+def on_user_change(doc, method=None):
+    """User doc event: forgets the old and new email, username and phone of the user."""
+    before = doc.get_doc_before_save()
+    for column in IDENTIFIER_COLUMNS:
+        clear_identifier_cache(doc.get(column), before and before.get(column))
+
 
 @frappe.whitelist(allow_guest=True)
+@rate_limit(limit=get_password_reset_limit, seconds=60 * 60)
 def reset(identifier=None):
     if not identifier:
         return {"status": "fail", "message": _("Identifier is required.")}
 
     identifier = identifier.strip().lower()
 
-    # RAW SQL search case-insensitively across username, email, phone
-    user = frappe.db.sql(
-        """
-        SELECT `name`, `email`
-        FROM `tabUser`
-        WHERE
-            LOWER(`username`) = %s
-            OR LOWER(`email`) = %s
-            OR LOWER(IFNULL(`phone`, '')) = %s
-            AND `enabled` = 1
-        LIMIT 1
-        """,
-        (identifier, identifier, identifier),
-        as_dict=1,
-    )
+    user_name = find_user(identifier)
+    user = _get_user(user_name, identifier)
+    if user_name and not user:
+        # Cached owner changed or lost the identifier since; look it up again
+        clear_identifier_cache(identifier)
+        user = _get_user(find_user(identifier), identifier)
 
     if not user:
         return {"status": "fail", "message":"No user found."}
 
-    user = user[0]
-
     # ensure the email field exists before attempting reset
     email = user.get("email")
     if not email or not validate_email_address(email, True):
@@ -1,8 +1,23 @@
+import json
 import frappe 
+from frappe.utils import now, validate_email_address
+from frappe_utils.website_customization.doctype.website_customization_settings.website_customization_settings import get_settings
+
+PENDING_SUBSCRIPTIONS_KEY = "frappe_utils:newsletter:pending"
+FLUSH_LOCK_KEY = "frappe_utils:newsletter:flush_lock"
+FLUSH_LOCK_TIMEOUT = 10 * 60
+FLUSH_BATCH_SIZE = 500
+# The set only dedupes signups between flushes; the database stays the source of truth
+SUBSCRIBED_TTL = 60 * 60
+
+
+def _get_subscribed_key(email_group):
+    return f"frappe_utils:newsletter:subscribed:{email_group}"
+
 
 @frappe.whitelist(allow_guest=True)
 def email(email):
-    website_customization_settings = frappe.get_doc("Website Customization Settings")
+    website_customization_settings = get_settings()
     if website_customization_settings.mail_enabled == 0:
         return {"message": "Email Subscription is not enabled at the moment", "status": "error"}
         
@@ -11,6 +26,13 @@ def email(email):
         frappe.log_error(title="Website Customization Settings", message="Email Group is not set")
         return {"message": "Email Service temporarily unavaiable", "status": "error"}
 
+    email = (email or "").strip().lower()
+    if not validate_email_address(email):
+        return {"message": "Please enter a valid email address", "status": "error"}
+
+    if website_customization_settings.buffer_subscriptions:
+        return _buffer_subscription(email_group, email)
+
     email_member = frappe.db.get_value("Email Group Member", {"email_group": email_group, "email": email,"unsubscribed": 0})
     if email_member:
         return {"message": "You are already subscribed to our newsletter", "status": "error"}
@@ -26,3 +48,90 @@ def email(email):
         frappe.log_error(title="Website Customization Settings", message=str(e))
         return {"message": "Email Service temporarily unavaiable", "status": "error"}
 
+
+def _buffer_subscription(email_group, email):
+    """
+    Deduplicates the signup in Redis and queues it for the next bulk flush,
+    without touching the database.
+    """
+    cache = frappe.cache()
+    subscribed_key = _get_subscribed_key(email_group)
+    if cache.sismember(subscribed_key, email):
+        return {"message": "You are already subscribed to our newsletter", "status": "error"}
+
+    cache.sadd(subscribed_key, email)
+    cache.expire(cache.make_key(subscribed_key), SUBSCRIBED_TTL)
+    cache.rpush(PENDING_SUBSCRIPTIONS_KEY, json.dumps({"email_group": email_group, "email": email}))
+
+    if cache.llen(PENDING_SUBSCRIPTIONS_KEY) >= FLUSH_BATCH_SIZE:
+        frappe.enqueue(
+            "frappe_utils.website_customization.api.subscribe.flush_pending_subscriptions",
+            job_id="frappe_utils_flush_pending_subscriptions",
+            deduplicate=True
+        )
+
+    return {"message": "You have been successfully subscribed to our newsletter", "status": "success"}
+
+
+def flush_pending_subscriptions():
+    """
+    Moves buffered signups into Email Group Member in bulk, one transaction per batch.
+    Runs from the scheduler and whenever the buffer fills up. A Redis lock keeps a
+    single flush at a time, so two runs never trim each other's entries; entries are
+    only trimmed after their batch is committed.
+    """
+    cache = frappe.cache()
+    lock = cache.lock(cache.make_key(FLUSH_LOCK_KEY), timeout=FLUSH_LOCK_TIMEOUT)
+    if not lock.acquire(blocking=False):
+        return
+
+    try:
+        while entries := cache.lrange(PENDING_SUBSCRIPTIONS_KEY, 0, FLUSH_BATCH_SIZE - 1):
+            emails_by_group = {}
+            for entry in entries:
+                entry = json.loads(entry)
+                emails_by_group.setdefault(entry["email_group"], set()).add(entry["email"])
+
+            for email_group, emails in emails_by_group.items():
+                _add_email_group_members(email_group, emails)
+
+            frappe.db.commit()
+            cache.ltrim(PENDING_SUBSCRIPTIONS_KEY, len(entries), -1)
+    finally:
+        lock.release()
+
+
+def on_email_group_member_change(doc, method=None):
+    """
+    Email Group Member doc event: forgets the address in the signup dedupe set, so a
+    member who unsubscribed or was removed can sign up again right away.
+    """
+    frappe.cache().srem(_get_subscribed_key(doc.email_group), doc.email)
+
+
+def _add_email_group_members(email_group, emails):
+    existing = frappe.get_all(
+        "Email Group Member",
+        filters={"email_group": email_group, "email": ["in", list(emails)]},
+        fields=["name", "email", "unsubscribed"]
+    )
+
+    # Members who unsubscribed earlier are subscribed again instead of duplicated
+    resubscribed = [d.name for d in existing if d.unsubscribed]
+    if resubscribed:
+        frappe.db.set_value("Email Group Member", {"name": ["in", resubscribed]}, "unsubscribed", 0)
+
+    new_emails = emails - {d.email for d in existing}
+    if new_emails:
+        timestamp = now()
+        frappe.db.bulk_insert(
+            "Email Group Member",
+            fields=["name", "email_group", "email", "unsubscribed", "creation", "modified", "owner", "modified_by"],
+            values=[
+                (frappe.generate_hash(length=10), email_group, email, 0, timestamp, timestamp, "Guest", "Guest")
+                for email in new_emails
+            ],
+            ignore_duplicates=True
+        )
+
+    frappe.get_doc("Email Group", email_group).update_total_subscribers()
@@ -1,37 +1,167 @@
 import frappe
-from frappe_utils.api import get_products_with_stock
+from frappe.utils import cint
+from frappe_utils.catalog import get_catalog_items, parse_fields, wants
+from frappe_utils.utils import get_cached, make_etag
+
+# webshop adds and removes rows with db_insert / frappe.db.delete, which skip doc events,
+# so changes made outside this module's wrappers are only picked up when the cache expires
+WISHLIST_CACHE_TTL = 5 * 60
+
+
+def _get_wishlist_key(user):
+    return f"frappe_utils:wishlist:{user}"
+
+
+def get_wishlist_state(user=None):
+    """
+    Cached wishlist of a user: {"item_codes": set, "version": str}.
+    The version is a hash of the item codes, so it only changes with the content.
+    """
+    user = user or frappe.session.user
+
+    def build():
+        item_codes = frappe.get_all("Wishlist Item", filters={"parent": user}, pluck="item_code")
+        return {"item_codes": set(item_codes), "version": make_etag(*sorted(item_codes))}
+
+    return get_cached(_get_wishlist_key(user), build, expires_in_sec=WISHLIST_CACHE_TTL)
+
+
+def get_wishlist_item_codes(user=None):
+    return get_wishlist_state(user)["item_codes"]
+
+
+def clear_wishlist_cache(user=None):
+    frappe.cache().delete_value(_get_wishlist_key(user or frappe.session.user))
+
+
+def on_wishlist_change(doc, method=None):
+    """Wishlist doc event: drop the owner's cached item codes."""
+    clear_wishlist_cache(doc.name)
+
+
 @frappe.whitelist()
 def create(item_code):
     from webshop.webshop.doctype.wishlist.wishlist import add_to_wishlist
     add_to_wishlist(item_code)
     frappe.db.commit()
+    clear_wishlist_cache()
 
 @frappe.whitelist()
 def remove(item_code):
     from webshop.webshop.doctype.wishlist.wishlist import remove_from_wishlist
     remove_from_wishlist(item_code)
     frappe.db.commit()  
+    clear_wishlist_cache()
 
 
 @frappe.whitelist()
-def get_wishlist(user, page=1, limit=10):
-    """Get paginated wishlist items with stock information for a user."""
-    page = int(page)
-    limit = int(limit)  
-    offset = (page - 1) * limit
-    query = """
-        SELECT item_code
-        FROM `tabWishlist Item`
-        WHERE parent = %s
-        ORDER BY idx DESC
-        LIMIT %s OFFSET %s
+def update(add=None, remove=None):
+    """
+    Adds and removes many wishlist items in a single transaction.
+    Item codes are deduplicated; an item in both lists is left untouched.
+    Args:
+        add (list/json): Item codes to add
+        remove (list/json): Item codes to remove
+    Returns:
+        dict: {"version", "item_codes"} of the updated wishlist
     """
-    result = frappe.db.sql(query, (user, limit, offset), as_dict=True)
-    names = [d.item_code for d in result]
-    
-    if not names:
-        return []
-    
-    # Pass names as field_filters with 'item_code' field
-    data = get_products_with_stock(query_args={"field_filters": {"item_code": names}})
-    return data.get("items", [])
+    user = frappe.session.user
+    add = set(_parse_item_codes(add))
+    remove = set(_parse_item_codes(remove))
+    add, remove = add - remove, remove - add
+
+    if frappe.db.exists("Wishlist", user):
+        wishlist = frappe.get_doc("Wishlist", user)
+    else:
+        wishlist = frappe.get_doc({"doctype": "Wishlist", "user": user})
+
+    existing = {row.item_code for row in wishlist.items}
+    to_add = [code for code in add if code not in existing]
+
+    if to_add or existing & remove:
+        wishlist.items = [row for row in wishlist.items if row.item_code not in remove]
+
+        web_items = frappe.get_all(
+            "Website Item",
+            filters={"item_code": ["in", to_add]},
+            fields=["name", "item_code", "item_name", "item_group", "web_item_name",
+                    "website_image", "website_warehouse", "route"]
+        ) if to_add else []
+
+        for web_item in web_items:
+            wishlist.append("items", {
+                "item_code": web_item.item_code,
+                "item_name": web_item.item_name,
+                "item_group": web_item.item_group,
+                "website_item": web_item.name,
+                "web_item_name": web_item.web_item_name,
+                "image": web_item.website_image,
+                "warehouse": web_item.website_warehouse,
+                "route": web_item.route
+            })
+
+        # Keep idx gapless and unique, get_wishlist pages on it
+        for idx, row in enumerate(wishlist.items, start=1):
+            row.idx = idx
+
+        wishlist.save(ignore_permissions=True)
+        frappe.db.commit()
+        clear_wishlist_cache(user)
+
+        if hasattr(frappe.local, "cookie_manager"):
+            frappe.local.cookie_manager.set_cookie("wish_count", str(len(wishlist.items)))
+
+    state = get_wishlist_state(user)
+    return {"version": state["version"], "item_codes": sorted(state["item_codes"])}
+
+
+def _parse_item_codes(item_codes):
+    if isinstance(item_codes, str):
+        item_codes = frappe.parse_json(item_codes)
+    return [code for code in item_codes or [] if code]
+
+
+@frappe.whitelist()
+def get_wishlist(cursor=None, limit=10, fields=None):
+    """
+    Keyset-paginated wishlist of the session user, newest first, with price and stock.
+    Args:
+        cursor (str): `next_cursor` of the previous page, "<idx>|<name>" of its last row
+        limit (int): Page size
+        fields (list|str): Optional projection; price and stock are only looked up when requested
+    Returns:
+        dict: {"items", "next_cursor"}
+    """
+    user = frappe.session.user
+    limit = min(max(cint(limit), 1), 100)
+    values = {"user": user, "limit": limit}
+
+    # idx is not unique per wishlist (webshop appends len(items) + 1 after removals),
+    # so the row name breaks ties both in the order and in the keyset condition
+    keyset_condition = ""
+    if cursor:
+        idx, _, name = str(cursor).partition("|")
+        values.update({"idx": cint(idx), "name": name})
+        keyset_condition = "AND (idx < %(idx)s OR (idx = %(idx)s AND name < %(name)s))"
+
+    result = frappe.db.sql(f"""
+        SELECT item_code, idx, name
+        FROM `tabWishlist Item`
+        WHERE parent = %(user)s
+        {keyset_condition}
+        ORDER BY idx DESC, name DESC
+        LIMIT %(limit)s
+    """, values, as_dict=True)
+
+    if not result:
+        return {"items": [], "next_cursor": None}
+
+    # Cursor comes from the raw page, so hidden items can't stall pagination
+    next_cursor = f"{result[-1].idx}|{result[-1].name}" if len(result) == limit else None
+    fields = parse_fields(fields)
+    items = get_catalog_items([d.item_code for d in result], fields=fields)
+    if wants(fields, "wished"):
+        for item in items:
+            item["wished"] = 1
+
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,187 @@
+# Copyright (c) 2026, TechInsights-AI and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import flt, now_datetime
+
+DOCTYPE = "Customer Financial Summary"
+
+
+class CustomerFinancialSummary(Document):
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_unique(DOCTYPE, ["customer", "company"], constraint_name="unique_customer_company")
+
+
+def get_financial_summary(customer):
+	"""
+	Per-company credit limit and outstanding of a customer, read from the summary table.
+	Customers that were never summarised are computed from the live tables without
+	writing anything: this runs on GET requests, and the rows are created by the doc
+	events and the reconcile job.
+	"""
+	rows = frappe.get_all(
+		DOCTYPE,
+		filters={"customer": customer},
+		fields=["company", "credit_limit", "outstanding"],
+		order_by="company asc"
+	)
+	if rows:
+		return rows
+
+	return [
+		frappe._dict(company=company, **values)
+		for company, values in sorted(_get_live_summary(customer).items())
+	]
+
+
+def rebuild_financial_summary(customer):
+	"""Recomputes every company row of a customer from Customer Credit Limit and Sales Invoice."""
+	for company, values in _get_live_summary(customer).items():
+		_upsert(customer, company, values)
+
+
+def _get_live_summary(customer):
+	"""{company: {"credit_limit", "outstanding"}} of a customer from the live tables."""
+	credit_limits = _get_credit_limits(customer)
+	outstanding = _get_outstanding(customer)
+
+	return {
+		company: {
+			"credit_limit": credit_limits.get(company, 0),
+			"outstanding": outstanding.get(company, 0)
+		}
+		for company in set(credit_limits) | set(outstanding)
+	}
+
+
+def update_outstanding(customer, company):
+	"""Refreshes the outstanding of one (customer, company) row only."""
+	if not (customer and company):
+		return
+
+	_upsert(customer, company, {"outstanding": _get_outstanding(customer, company).get(company, 0)})
+
+
+def _get_credit_limits(customer):
+	return {
+		d.company: flt(d.credit_limit)
+		for d in frappe.db.sql("""
+			SELECT company, SUM(credit_limit) AS credit_limit
+			FROM `tabCustomer Credit Limit`
+			WHERE parent = %s AND parenttype = 'Customer'
+			GROUP BY company
+		""", customer, as_dict=True)
+	}
+
+
+def _get_outstanding(customer, company=None):
+	company_condition = "AND company = %(company)s" if company else ""
+	return {
+		d.company: flt(d.outstanding)
+		for d in frappe.db.sql(f"""
+			SELECT company, SUM(IFNULL(outstanding_amount, 0)) AS outstanding
+			FROM `tabSales Invoice`
+			WHERE customer = %(customer)s AND docstatus = 1
+			{company_condition}
+			GROUP BY company
+		""", {"customer": customer, "company": company}, as_dict=True)
+	}
+
+
+def _upsert(customer, company, values):
+	name = frappe.db.get_value(DOCTYPE, {"customer": customer, "company": company})
+	if name:
+		frappe.db.set_value(DOCTYPE, name, values)
+	else:
+		doc = frappe.get_doc({"doctype": DOCTYPE, "customer": customer, "company": company, **values})
+		doc.insert(ignore_permissions=True)
+
+
+# Doc events
+# ----------
+
+def on_sales_invoice_change(doc, method=None):
+	update_outstanding(doc.customer, doc.company)
+	if doc.get("return_against"):
+		# Credit notes reduce the outstanding of the invoice they return
+		return_against = frappe.db.get_value("Sales Invoice", doc.return_against, ["customer", "company"], as_dict=True)
+		if return_against and return_against.customer != doc.customer:
+			update_outstanding(return_against.customer, return_against.company)
+
+
+def on_payment_entry_change(doc, method=None):
+	if doc.party_type == "Customer":
+		update_outstanding(doc.party, doc.company)
+
+
+def on_journal_entry_change(doc, method=None):
+	customers = {row.party for row in doc.accounts if row.party_type == "Customer" and row.party}
+	for customer in customers:
+		update_outstanding(customer, doc.company)
+
+
+def on_customer_update(doc, method=None):
+	"""Syncs credit limits from the Customer's Credit Limit table."""
+	credit_limits = {}
+	for row in doc.get("credit_limits") or []:
+		credit_limits[row.company] = credit_limits.get(row.company, 0) + flt(row.credit_limit)
+
+	existing = frappe.get_all(DOCTYPE, filters={"customer": doc.name}, pluck="company")
+	for company in set(credit_limits) | set(existing):
+		_upsert(doc.name, company, {"credit_limit": credit_limits.get(company, 0)})
+
+
+# Reconciliation
+# --------------
+
+def reconcile_financial_summaries():
+	"""
+	Scheduled check of the summary table against the live aggregates.
+	Drifted or missing rows are corrected and the number of fixes is logged.
+	"""
+	live = {}
+	for d in frappe.db.sql("""
+		SELECT customer, company, SUM(IFNULL(outstanding_amount, 0)) AS outstanding
+		FROM `tabSales Invoice`
+		WHERE docstatus = 1
+		GROUP BY customer, company
+	""", as_dict=True):
+		live.setdefault((d.customer, d.company), {"credit_limit": 0.0, "outstanding": 0.0})["outstanding"] = flt(d.outstanding)
+
+	for d in frappe.db.sql("""
+		SELECT parent AS customer, company, SUM(credit_limit) AS credit_limit
+		FROM `tabCustomer Credit Limit`
+		WHERE parenttype = 'Customer'
+		GROUP BY parent, company
+	""", as_dict=True):
+		live.setdefault((d.customer, d.company), {"credit_limit": 0.0, "outstanding": 0.0})["credit_limit"] = flt(d.credit_limit)
+
+	stored = {
+		(d.customer, d.company): d
+		for d in frappe.get_all(DOCTYPE, fields=["name", "customer", "company", "credit_limit", "outstanding"])
+	}
+
+	corrected = 0
+	for key, values in live.items():
+		row = stored.pop(key, None)
+		if row and all(abs(flt(row[field]) - values[field]) < 0.01 for field in values):
+			continue
+
+		corrected += 1
+		_upsert(key[0], key[1], values)
+
+	# Rows left over have neither invoices nor credit limits any more
+	for row in stored.values():
+		if flt(row.credit_limit) or flt(row.outstanding):
+			corrected += 1
+			frappe.db.set_value(DOCTYPE, row.name, {"credit_limit": 0, "outstanding": 0})
+
+	frappe.db.sql(f"UPDATE `tab{DOCTYPE}` SET last_reconciled_on = %s", now_datetime())
+	frappe.db.commit()
+
+	if corrected:
+		frappe.logger("frappe_utils").warning(f"{DOCTYPE}: corrected {corrected} drifted rows")
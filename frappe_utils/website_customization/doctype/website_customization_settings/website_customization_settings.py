@@ -1,9 +1,60 @@
 # Copyright (c) 2026, TechInsights-AI and contributors
 # For license information, please see license.txt
 
-# import frappe
+import frappe
 from frappe.model.document import Document
 
+SETTINGS_CACHE_KEY = "frappe_utils:website_customization_settings"
+SETTINGS_VERSION_KEY = "frappe_utils:website_customization_settings:version"
+
+# Process-local copies keyed by site, revalidated against the version kept in Redis
+_local_settings = {}
+
 
 class WebsiteCustomizationSettings(Document):
-	pass
+	def on_update(self):
+		clear_settings_cache()
+
+
+def get_settings():
+	"""
+	Returns Website Customization Settings, child tables included, as a read-only dict.
+	Served from a process-local copy while its `modified` matches the version in Redis,
+	then from Redis, and only rebuilt from the database after a save.
+	"""
+	site = frappe.local.site
+	cache = frappe.cache()
+	version = cache.get_value(SETTINGS_VERSION_KEY)
+
+	settings = _local_settings.get(site)
+	if version and settings and settings.modified == version:
+		return settings
+
+	settings = cache.get_value(SETTINGS_CACHE_KEY)
+	if not version or not settings or settings.modified != version:
+		settings = _build_settings()
+		cache.set_value(SETTINGS_CACHE_KEY, settings)
+		cache.set_value(SETTINGS_VERSION_KEY, settings.modified)
+
+	_local_settings[site] = settings
+	return settings
+
+
+def clear_settings_cache():
+	frappe.cache().delete_value([SETTINGS_CACHE_KEY, SETTINGS_VERSION_KEY])
+	_local_settings.pop(frappe.local.site, None)
+
+
+def _build_settings():
+	doc = frappe.get_doc("Website Customization Settings")
+	settings = frappe._dict(doc.as_dict(no_default_fields=True))
+	settings.modified = str(doc.modified)
+
+	# Child tables are always consumed in their configured order
+	for fieldname in ("section_setting", "category"):
+		settings[fieldname] = sorted(
+			(frappe._dict(row) for row in settings.get(fieldname) or []),
+			key=lambda row: row.get("order") or 0
+		)
+
+	return settings
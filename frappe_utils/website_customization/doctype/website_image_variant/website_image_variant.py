@@ -0,0 +1,221 @@
+# Copyright (c) 2026, TechInsights-AI and contributors
+# For license information, please see license.txt
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import unquote
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import now_datetime
+from frappe_utils.utils import make_etag
+
+DOCTYPE = "Website Image Variant"
+VARIANT_WIDTHS = (160, 320, 640, 1024)
+VARIANT_FOLDER = "variants"
+WEBP_QUALITY = 80
+BACKFILL_CHUNK_SIZE = 100
+
+
+class WebsiteImageVariant(Document):
+	pass
+
+
+def get_image_hash(url):
+	return make_etag(url)
+
+
+def get_image_variants(urls):
+	"""
+	Generated WebP variants of many image URLs in one query:
+	{url: {"160": "/files/variants/<hash>-160.webp", ...}}. Images without variants yet are left out.
+	"""
+	urls = {get_image_hash(url): url for url in set(urls) if url}
+	if not urls:
+		return {}
+
+	rows = frappe.get_all(
+		DOCTYPE,
+		filters={"name": ["in", list(urls)], "status": "Done"},
+		fields=["name", "variants"]
+	)
+	return {urls[row.name]: json.loads(row.variants) for row in rows if row.variants}
+
+
+def _get_local_path(url):
+	"""Disk path of a public site file URL; None for private or remote images."""
+	if not url or not url.startswith("/files/"):
+		return None
+
+	path = os.path.realpath(frappe.get_site_path("public", unquote(url.split("?", 1)[0]).lstrip("/")))
+	files_root = os.path.realpath(frappe.get_site_path("public", "files"))
+	if not path.startswith(files_root + os.sep) or not os.path.isfile(path):
+		return None
+
+	return path
+
+
+def queue_image_variants(urls):
+	"""Queues variant generation for the public images among `urls`."""
+	urls = sorted({url for url in urls if _get_local_path(url)})
+	if not urls:
+		return
+
+	frappe.enqueue(
+		"frappe_utils.website_customization.doctype.website_image_variant.website_image_variant.generate_image_variants",
+		urls=urls,
+		queue="long",
+		timeout=3600,
+		enqueue_after_commit=True,
+		job_name=f"Image variants for {len(urls)} image(s)"
+	)
+
+
+def generate_image_variants(urls):
+	"""
+	Background job: resizes each image to the variant widths as WebP.
+	Images whose content didn't change since the last run are skipped; the resizing
+	itself runs in a process pool so a batch uses all cores.
+	"""
+	output_folder = frappe.get_site_path("public", "files", VARIANT_FOLDER)
+	os.makedirs(output_folder, exist_ok=True)
+
+	existing = {
+		row.name: row for row in frappe.get_all(
+			DOCTYPE,
+			filters={"name": ["in", [get_image_hash(url) for url in urls]]},
+			fields=["name", "content_hash", "status"]
+		)
+	}
+
+	tasks = []
+	for url in urls:
+		path = _get_local_path(url)
+		if not path:
+			continue
+
+		image_hash = get_image_hash(url)
+		content_hash = _get_content_hash(path)
+		current = existing.get(image_hash)
+		if current and current.status == "Done" and current.content_hash == content_hash:
+			continue
+
+		tasks.append((url, image_hash, content_hash, path))
+
+	if not tasks:
+		return
+
+	# A pool only pays off for batches; single images are resized in place
+	if len(tasks) == 1:
+		results = [_resize_image(tasks[0][3], output_folder, tasks[0][1], VARIANT_WIDTHS)]
+	else:
+		with ProcessPoolExecutor(max_workers=min(len(tasks), os.cpu_count() or 1)) as pool:
+			results = list(pool.map(
+				_resize_image,
+				[task[3] for task in tasks],
+				[output_folder] * len(tasks),
+				[task[1] for task in tasks],
+				[VARIANT_WIDTHS] * len(tasks)
+			))
+
+	for (url, image_hash, content_hash, _path), (filenames, error) in zip(tasks, results):
+		variants = {
+			str(width): f"/files/{VARIANT_FOLDER}/{filename}" for width, filename in filenames.items()
+		}
+		_save_variants(image_hash, url, content_hash, variants, error)
+
+	frappe.db.commit()
+
+
+def _get_content_hash(path):
+	digest = hashlib.sha1()
+	with open(path, "rb") as file:
+		while block := file.read(1024 * 1024):
+			digest.update(block)
+	return digest.hexdigest()
+
+
+def _resize_image(path, output_folder, image_hash, widths):
+	"""
+	Runs in a pool worker, so it must not touch frappe.
+	Returns ({width: filename}, error). Widths above the original are not upscaled;
+	the original width is used once instead.
+	"""
+	from PIL import Image, ImageOps
+
+	filenames = {}
+	try:
+		with Image.open(path) as image:
+			image = ImageOps.exif_transpose(image)
+			if image.mode not in ("RGB", "RGBA"):
+				has_alpha = "A" in image.getbands() or "transparency" in image.info
+				image = image.convert("RGBA" if has_alpha else "RGB")
+
+			for width in sorted(widths):
+				target = min(width, image.width)
+				height = max(round(image.height * target / image.width), 1)
+				filename = f"{image_hash}-{width}.webp"
+				resized = image.resize((target, height), Image.LANCZOS) if target < image.width else image
+				resized.save(os.path.join(output_folder, filename), "WEBP", quality=WEBP_QUALITY, method=4)
+				filenames[width] = filename
+				if target == image.width:
+					break
+	except Exception as e:
+		return filenames, str(e)
+
+	return filenames, None
+
+
+def _save_variants(image_hash, url, content_hash, variants, error=None):
+	values = {
+		"source_url": url,
+		"content_hash": content_hash,
+		"variants": json.dumps(variants),
+		"status": "Failed" if error else "Done",
+		"error": error,
+		"generated_on": now_datetime()
+	}
+
+	if frappe.db.exists(DOCTYPE, image_hash):
+		frappe.db.set_value(DOCTYPE, image_hash, values)
+	else:
+		frappe.get_doc({"doctype": DOCTYPE, "image_hash": image_hash, **values}).insert(ignore_permissions=True)
+
+
+def on_website_item_change(doc, method=None):
+	"""Website Item doc event: queues variants when the website image changes."""
+	if doc.website_image and doc.has_value_changed("website_image"):
+		queue_image_variants([doc.website_image])
+
+
+def on_website_slideshow_change(doc, method=None):
+	"""Website Slideshow doc event: queues variants for its images (unchanged ones are skipped by the job)."""
+	queue_image_variants([row.image for row in doc.get("slideshow_items") or []])
+
+
+@frappe.whitelist()
+def backfill_image_variants():
+	"""
+	Queues variant generation for every Website Item and slideshow image that has
+	none yet, in chunks so the jobs stay short.
+	"""
+	frappe.only_for("System Manager")
+
+	urls = set(frappe.get_all("Website Item", filters={"website_image": ["is", "set"]}, pluck="website_image"))
+	urls.update(frappe.get_all("Website Slideshow Item", filters={"image": ["is", "set"]}, pluck="image"))
+
+	done = set(frappe.get_all(DOCTYPE, filters={"status": "Done"}, pluck="name"))
+	urls = sorted(url for url in urls if get_image_hash(url) not in done and _get_local_path(url))
+
+	for start in range(0, len(urls), BACKFILL_CHUNK_SIZE):
+		frappe.enqueue(
+			"frappe_utils.website_customization.doctype.website_image_variant.website_image_variant.generate_image_variants",
+			urls=urls[start:start + BACKFILL_CHUNK_SIZE],
+			queue="long",
+			timeout=3600,
+			job_name=f"Image variant backfill {start // BACKFILL_CHUNK_SIZE + 1}"
+		)
+
+	return {"queued": len(urls)}